@@ -1,2 +1,4 @@
 # -*- coding: utf-8 -*-
-from .klei_id import convert, IDType
+from .klei_id import convert, convert_many, k2i, i2k, k2i_many, i2k_many, IDType
+from .kuid_index import KUIDIndex
+from .harvest import harvest, harvest_stream, Harvest, FileReport
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+批量转换 kleiID 与玩家存档文件夹名，每行一个 id，结果按行输出到标准输出
+    python -m klei_id ids.txt
+    cat ids.txt | python -m klei_id --type kleiID > dirnames.txt
+    python -m klei_id client_save --pair
+
+文件夹参数会将其中的子文件夹名作为输入，便于直接转换 client_save 下所有玩家的存档文件夹
+每行输入对应一行输出，转换失败的行输出为空行，原因写入标准错误，存在失败时退出码为 1
+"""
+
+from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import TextIOWrapper
+from itertools import islice
+from os import cpu_count
+from pathlib import Path
+import sys
+from typing import Iterable, Iterator, Optional
+
+from .klei_id import IDType, convert, convert_many
+
+_TYPES = {'auto': IDType.unknown, 'kleiID': IDType.kleiID, 'dirname': IDType.dirname}
+
+
+def _read_lines(sources: list[str]) -> Iterator[str]:
+    if not sources:
+        yield from (i.strip() for i in TextIOWrapper(sys.stdin.buffer, encoding='utf-8'))
+    for source in map(Path, sources):
+        if source.is_dir():
+            yield from sorted(i.name for i in source.iterdir() if i.is_dir())
+        else:
+            with source.open('r', encoding='utf-8') as f:
+                yield from (i.strip() for i in f)
+
+
+def _batches(lines: Iterator[str], size: int) -> Iterator[list[str]]:
+    while batch := list(islice(lines, size)):
+        yield batch
+
+
+def _convert_batch(batch: list[str], id_type: IDType) -> list[Optional[str]]:
+    """整批转换，出错时逐个转换，失败的项为 None"""
+    try:
+        return convert_many(batch, id_type)
+    except ValueError:
+        pass
+    result = []
+    for text in batch:
+        try:
+            result.append(convert(text, id_type))
+        except ValueError:
+            result.append(None)
+    return result
+
+
+def _convert_all(batches: Iterable[list[str]], id_type: IDType, workers: int) -> Iterator[list[Optional[str]]]:
+    """按顺序产出每批的结果，并行时最多同时处理 workers 的两倍批，避免输入过大时占满内存"""
+    if workers == 1:
+        yield from (_convert_batch(i, id_type) for i in batches)
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.submit(_convert_batch, batch, id_type))
+            if len(pending) > workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def main(argv: list[str] = None) -> int:
+    parser = ArgumentParser(prog='python -m klei_id', description='批量转换 kleiID 与玩家存档文件夹名')
+    parser.add_argument('sources', nargs='*', help='输入文件或文件夹，默认从标准输入读取')
+    parser.add_argument('--type', choices=list(_TYPES), default='auto', help='输入 id 的类型，默认按 KU 前缀自动判断')
+    parser.add_argument('--batch-size', type=int, default=1 << 16, help='每批转换的行数')
+    parser.add_argument('--workers', type=int, default=1, help='并行进程数，0 为与 CPU 核心数一致')
+    parser.add_argument('--pair', action='store_true', help='输出 "输入\\t结果"')
+    args = parser.parse_args(argv)
+    if args.batch_size < 1:
+        parser.error('--batch-size 应大于 0')
+
+    # 并行时结果按批返回，输入留在队列中，用于输出 pair 及定位失败的行
+    inputs = deque()
+
+    def tee() -> Iterator[list[str]]:
+        for batch in _batches(_read_lines(args.sources), args.batch_size):
+            inputs.append(batch)
+            yield batch
+
+    failed, line_no = 0, 0
+    out = sys.stdout.buffer
+    for converted in _convert_all(tee(), _TYPES[args.type], args.workers or cpu_count()):
+        batch = inputs.popleft()
+        for offset in (i for i, j in enumerate(converted) if j is None):
+            failed += 1
+            print(f'第 {line_no + offset + 1} 行转换失败: {batch[offset]!r}', file=sys.stderr)
+        line_no += len(batch)
+
+        if args.pair:
+            text = '\n'.join(f'{i}\t{j or ""}' for i, j in zip(batch, converted))
+        else:
+            text = '\n'.join(i or '' for i in converted)
+        out.write(text.encode('utf-8') + b'\n')
+    out.flush()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+从日志等文件中收集 kleiID
+文件通过 mmap 分块交给预编译的 bytes 正则匹配，不需要整体读入内存，也不需要解码为 str
+分块的边界总是落在不可能出现在 kleiID 中的字节（空白、标点等）上，跨块的 id 不会被截断，结果与整体匹配完全一致
+多个文件在进程池中并行处理，结果去重后存入 KUIDIndex
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import chain
+from mmap import mmap, ACCESS_READ
+from os import PathLike
+from pathlib import Path
+from re import compile
+from time import perf_counter
+from typing import BinaryIO, Iterable, NamedTuple, Optional, Union
+
+from .klei_id import k2i_many
+from .kuid_index import KUIDIndex
+
+_KUID = compile(rb'KU_[0-9A-Za-z_-]{8}')
+# kleiID 中不可能出现的字节，作为分块的边界
+_SEP = compile(rb'[^0-9A-Za-z_-]')
+_ID_BYTES = b'0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_-'
+# 分块大小，同时也是单次 findall 结果的规模上限
+CHUNK_SIZE = 1 << 24
+
+arg_path = Union[str, PathLike]
+
+
+class FileReport(NamedTuple):
+    path: Path
+    size: int
+
+    # 匹配到的次数，包含重复
+    count: int
+
+    # 文件内去重后的数量
+    unique: int
+
+    # 秒
+    elapsed: float
+
+    # 读取失败的原因，正常时为 None
+    error: Optional[str] = None
+
+    @property
+    def mbps(self) -> float:
+        return self.size / self.elapsed / 1e6 if self.elapsed else 0.0
+
+
+class Harvest(NamedTuple):
+    index: KUIDIndex
+    files: list[FileReport]
+
+    # 秒，整体耗时，并行时小于各文件耗时之和
+    elapsed: float
+
+    @property
+    def size(self) -> int:
+        return sum(i.size for i in self.files)
+
+    @property
+    def count(self) -> int:
+        return sum(i.count for i in self.files)
+
+    @property
+    def mbps(self) -> float:
+        return self.size / self.elapsed / 1e6 if self.elapsed else 0.0
+
+
+def _cut(data, start: int) -> int:
+    """start 之后第一个分隔字节的位置，找不到时返回数据长度"""
+    match = _SEP.search(data, start)
+    return match.start() if match else len(data)
+
+
+def harvest_buffer(data, chunk_size: int = CHUNK_SIZE) -> tuple[int, set[bytes]]:
+    """在 bytes、mmap 等支持缓冲区协议的对象中查找，返回匹配次数与去重后的 id"""
+    count, found, start, size = 0, set(), 0, len(data)
+    while start < size:
+        stop = _cut(data, start + chunk_size) if start + chunk_size < size else size
+        matches = _KUID.findall(data, start, stop)
+        count += len(matches)
+        found.update(matches)
+        start = stop
+    return count, found
+
+
+def harvest_stream(source: BinaryIO, chunk_size: int = CHUNK_SIZE) -> tuple[int, set[bytes]]:
+    """
+    从无法 mmap 的流（标准输入、管道等）中分块读取并查找，返回值同 harvest_buffer
+    每块末尾最后一个分隔字节之后的部分（通常不超过 11 字节）留到下一块中一起匹配
+    """
+    count, found, carry = 0, set(), b''
+    for chunk in iter(partial(source.read, chunk_size), b''):
+        buffer = carry + chunk
+        # 分隔字节之前的部分不会再与之后的数据组成 id，通常在最后 11 个字节内就能找到
+        stop = _cut(buffer, max(0, len(buffer) - 11))
+        if stop == len(buffer):
+            stop = len(buffer.rstrip(_ID_BYTES))
+        matches = _KUID.findall(buffer, 0, stop)
+        count += len(matches)
+        found.update(matches)
+        carry = buffer[stop:]
+    matches = _KUID.findall(carry)
+    return count + len(matches), found.union(matches)
+
+
+def _harvest_file(path: Path, chunk_size: int = CHUNK_SIZE) -> tuple[FileReport, list[int]]:
+    start = perf_counter()
+    try:
+        with path.open('rb') as file:
+            size = path.stat().st_size
+            if not path.is_file():
+                count, found = harvest_stream(file, chunk_size)
+            elif not size:
+                count, found = 0, set()
+            else:
+                with mmap(file.fileno(), 0, access=ACCESS_READ) as mm:
+                    count, found = harvest_buffer(mm, chunk_size)
+    except (OSError, ValueError) as e:
+        return FileReport(path, 0, 0, 0, perf_counter() - start, str(e)), []
+    # 进程间传递整数比传递字符串快得多
+    numbers = k2i_many(i.decode('ascii') for i in found)
+    return FileReport(path, size, count, len(found), perf_counter() - start), numbers
+
+
+def _iter_files(paths: Iterable[arg_path], pattern: str, recursive: bool) -> Iterable[Path]:
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from (i for i in (path.rglob(pattern) if recursive else path.glob(pattern)) if i.is_file())
+        elif path.exists():
+            yield path
+        else:
+            raise ValueError(f'路径不存在 {path.absolute()}')
+
+
+def harvest(paths: Union[arg_path, Iterable[arg_path]], pattern: str = '*', recursive: bool = True,
+            workers: int = None, chunk_size: int = CHUNK_SIZE) -> Harvest:
+    """
+    收集 paths 中所有文件里的 kleiID，paths 可以是单个或多个文件、文件夹
+    文件夹中只处理匹配 pattern 的文件，recursive 为 False 时不进入子文件夹
+    workers 为并行数，默认与 CPU 核心数一致，为 1 时直接在当前进程中处理
+    读取失败的文件不会中断收集，原因记录在对应 FileReport 的 error 中
+    """
+    if isinstance(paths, (str, PathLike)):
+        paths = (paths,)
+    files = list(_iter_files(paths, pattern, recursive))
+    fn = partial(_harvest_file, chunk_size=chunk_size)
+
+    start = perf_counter()
+    if workers == 1 or len(files) <= 1:
+        results = [fn(i) for i in files]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(fn, files))
+    index = KUIDIndex(chain.from_iterable(numbers for _, numbers in results))
+    return Harvest(index, [report for report, _ in results], perf_counter() - start)
@@ -7,12 +7,38 @@ klei 的编码规则
     alphabet = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-_'
 """
 
+from array import array
+from binascii import a2b_base64, b2a_base64
 from enum import IntEnum, StrEnum
-from typing import Literal
+from itertools import compress, islice, repeat
+from operator import not_
+from re import compile as re_compile
+from struct import iter_unpack
+from sys import byteorder
+from typing import Iterable, Literal, Optional
 
 alphabet64 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-_'
 alphabet32 = alphabet64[:32]
 
+# 批量转换时先将 klei 的字母表转为标准 base64 字母表，交给 binascii 一次性处理
+_std64 = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+_to_std64 = str.maketrans(alphabet64, _std64)
+_from_std64 = str.maketrans(_std64, alphabet64)
+# 字符与其数值（单字节）互转的查找表，bytes.translate 一次完成整个字符串的转换，代替 str.index/find 的逐个线性查找
+_alphabet64_set = frozenset(alphabet64)
+_alphabet32_set = frozenset(alphabet32)
+_char2bits64 = bytes.maketrans(alphabet64.encode('ascii'), bytes(range(64)))
+_char2bits32 = bytes.maketrans(alphabet32.encode('ascii'), bytes(range(32)))
+_bits2char64 = bytes.maketrans(bytes(range(64)), alphabet64.encode('ascii'))
+
+# 可以批量处理的规范格式，其余的交给 k2d/d2k 逐个处理
+_kleiid_regular = re_compile('[0-9A-Za-z_-]{2}_[0-9A-Za-z_-]{8}')
+_dirname_regular = re_compile('[0-9A-V]{12}')
+_kleiid_int = re_compile('KU_[0-9A-Za-z_-]{8}')
+
+# 批量转换时每批的数量
+_BATCH = 1 << 16
+
 
 class IDType(StrEnum):
     kleiID = 'kleiID'
@@ -81,12 +107,11 @@ def d2k(text: str) -> str:
         underline = False
         text = text.removeprefix('_')
 
-    char_bits = [alphabet32.find(i) for i in text]
-    if -1 in char_bits:
+    if not _alphabet32_set.issuperset(text):
         raise ValueError(f"{text} 中包含非法字符，所有字符都应在该字母表内：{alphabet32}")
+    char_bits = text.encode('ascii').translate(_char2bits32)
     if base64:
-        # result = ''.join(convert(char_bits, DirName.char_bitlen, KleiID.char_bitlen).decode('ascii').translate(alphabet64))
-        result = ''.join(alphabet64[i] for i in _convert(char_bits, DirName.char_bitlen, KleiID.char_bitlen))
+        result = _convert(char_bits, DirName.char_bitlen, KleiID.char_bitlen).translate(_bits2char64).decode('ascii')
     else:
         result = _convert(char_bits, Unknown.char_bitlen, KleiID.char_bitlen).decode('utf-8')
     if underline:
@@ -97,7 +122,7 @@ def d2k(text: str) -> str:
 def k2d(text: str) -> str:
     """将 kleiID 转换为对应的 玩家存档文件夹名"""
 
-    if any(i not in alphabet64 for i in text):
+    if not _alphabet64_set.issuperset(text):
         # 如果包含不在字母表中的字符，进行特殊处理，可能是兼容性处理吧
         old_bitlen = Unknown.char_bitlen
         pre = '__'
@@ -111,11 +136,28 @@ def k2d(text: str) -> str:
                 text = text[:2] + text[3:]
             else:
                 pre = '_'
-        char_bits = (alphabet64.index(i) for i in text)
-    result = ''.join((alphabet64[i] for i in _convert(char_bits, old_bitlen, DirName.char_bitlen)))
+        char_bits = text.encode('ascii').translate(_char2bits64)
+    result = _convert(char_bits, old_bitlen, DirName.char_bitlen).translate(_bits2char64).decode('ascii')
     return f'{pre}{result}'
 
 
+def k2i(text: str) -> int:
+    """
+    将 KU_XXXXXXXX 格式的 kleiID 转为 48 位整数，KU_ 是固定的，只编码后 8 位
+    整数的大小顺序与按字母表顺序比较后 8 位一致，可以直接用于排序、比较与存储
+    """
+    if not _kleiid_int.fullmatch(text):
+        raise ValueError(f'{text} 不是 KU_XXXXXXXX 格式的 kleiID')
+    return int.from_bytes(a2b_base64(text[3:].translate(_to_std64)), 'big')
+
+
+def i2k(number: int) -> str:
+    """k2i 的逆运算"""
+    if not 0 <= number < 1 << 48:
+        raise ValueError(f'{number} 超出了 48 位整数的范围')
+    return 'KU_' + b2a_base64(number.to_bytes(6, 'big'), newline=False).decode('ascii').translate(_from_std64)
+
+
 def convert(text: str, id_type: arg_id_type = IDType.unknown) -> str:
     match id_type:
         case IDType.unknown:
@@ -130,6 +172,194 @@ def convert(text: str, id_type: arg_id_type = IDType.unknown) -> str:
             raise ValueError(f'id_type 应为 {list(IDType)} 之一或留空')
 
 
+def _lanes(value: int, count: int) -> int:
+    """将 96 位的 value 重复 count 次拼接，作为批量位运算的掩码"""
+    return int.from_bytes(value.to_bytes(12, 'big') * count, 'big')
+
+
+def _kleiid_lanes(texts: list[str]) -> Optional[int]:
+    """
+    每个 id 前补 5 个零字符凑成 16 字符，拼接后一次 base64 解码，所有 id 拼成一个大整数
+    每个 id 正好占 96 位：30 位零 + KU(12) + _(6) + XXXXXXXX(48)，长度或字符不符时返回 None
+    """
+    if set(map(len, texts)) != {11}:
+        return None
+    pad = alphabet64[0] * 5
+    joined = pad + pad.join(texts)
+    if not joined.isascii() or joined.encode('ascii').translate(None, alphabet64.encode('ascii')):
+        return None
+    return int.from_bytes(a2b_base64(joined.translate(_to_std64)), 'big')
+
+
+def k2i_many(texts: Iterable[str]) -> list[int]:
+    """批量 k2i，结果与逐个调用 k2i 一致，有不规范的 id 时同样抛出 ValueError"""
+    result = []
+    texts = iter(texts)
+    while batch := list(islice(texts, _BATCH)):
+        count = len(batch)
+        lanes = _kleiid_lanes(batch)
+        # KU_ -> 0b010100 0b011110 0b111111
+        if lanes is None or (lanes >> 48) & _lanes(0x3ffff, count) != _lanes(20 << 12 | 30 << 6 | 63, count):
+            result.extend(map(k2i, batch))
+            continue
+        data = (lanes & _lanes((1 << 48) - 1, count)).to_bytes(12 * count, 'big')
+        result.extend(i for i, in iter_unpack('>4xQ', data))
+    return result
+
+
+def i2k_many(numbers: Iterable[int]) -> list[str]:
+    """
+    批量 i2k，结果与逐个调用 i2k 一致
+    48 位正好是 6 字节、8 个 base64 字符，只要把每个整数大端的低 6 字节连续排列，就能一次完成编码
+    """
+    try:
+        data = array('Q', numbers)
+    except OverflowError:
+        raise ValueError('有超出 48 位整数范围的数') from None
+    if data and max(data) >= 1 << 48:
+        raise ValueError(f'{max(data)} 超出了 48 位整数的范围')
+    if byteorder == 'little':
+        data.byteswap()
+    raw = data.tobytes()
+    packed = bytearray(len(data) * 6)
+    for i in range(6):
+        packed[i::6] = raw[i + 2::8]
+    chars = b2a_base64(packed, newline=False).decode('ascii').translate(_from_std64)
+    return ['KU_' + chars[i:i + 8] for i in range(0, len(chars), 8)]
+
+
+def _regroup_plan(char2bits: bytes, src_bits: int, dst_bits: int, total: int = 60) -> list[list[tuple[int, bytes]]]:
+    """
+    把 total 位从每个字符 src_bits 位重新分组为每个字符 dst_bits 位时，每个目标字符来自哪些源字符
+    结果中第 k 项为 [(源字符的序号, 查找表), ...]，查找表把源字符直接转为它在第 k 个目标字符中的那几位
+    """
+    plan = []
+    for k in range(total // dst_bits):
+        start, stop = k * dst_bits, (k + 1) * dst_bits
+        sources = []
+        for i in range(start // src_bits, (stop - 1) // src_bits + 1):
+            shift = total - src_bits * (i + 1)
+            sources.append((i, bytes(((v << shift) >> (total - stop)) & ((1 << dst_bits) - 1) for v in char2bits)))
+        plan.append(sources)
+    return plan
+
+
+# 60 位 kleiID（去掉 KU 后的下划线）的 10 个字符与文件夹名的 12 个字符之间的转换
+_K2D_PLAN = _regroup_plan(_char2bits64, KleiID.char_bitlen, DirName.char_bitlen)
+_D2K_PLAN = _regroup_plan(_char2bits32, DirName.char_bitlen, KleiID.char_bitlen)
+
+
+def _regroup(columns: list[bytes], plan: list[list[tuple[int, bytes]]]) -> list[bytes]:
+    """
+    按列批量重新分组，columns[i] 为所有 id 的第 i 个字符，结果的第 k 项为所有 id 第 k 个目标字符的值
+    每一列只需要查表，一个目标字符跨两个源字符时，两列查表的结果作为大整数按位或一次合并
+    """
+    result = []
+    for (i, table), *rest in plan:
+        column = columns[i].translate(table)
+        for j, other in rest:
+            column = (int.from_bytes(column, 'big') | int.from_bytes(columns[j].translate(other), 'big')
+                      ).to_bytes(len(column), 'big')
+        result.append(column)
+    return result
+
+
+def _columns(texts: list[str], length: int, alphabet: str) -> Optional[list[bytes]]:
+    """所有 id 按列拆分，第 i 项为所有 id 的第 i 个字符，长度或字符不符时返回 None"""
+    if set(map(len, texts)) != {length}:
+        return None
+    joined = ''.join(texts)
+    if not joined.isascii():
+        return None
+    data = joined.encode('ascii')
+    if data.translate(None, alphabet.encode('ascii')):
+        return None
+    return [data[i::length] for i in range(length)]
+
+
+def _k2d_bulk(texts: list[str]) -> Optional[list[str]]:
+    """
+    批量转换 KU_XXXXXXXX 格式的 kleiID，效果同 k2d，格式不符时返回 None
+    按列处理：去掉下划线一列后，通过 _regroup 把 10 个 6 位的字符重新分为 12 个 5 位的字符，最后查表转为字母表中的字符
+    所有操作都是对整列的 bytes 切片、查表，不会逐个 id 循环
+    """
+    count = len(texts)
+    if (columns := _columns(texts, 11, alphabet64)) is None or columns[2] != b'_' * count:
+        return None
+    # 每个 id 后留一个字节作为分隔符，最后通过 split 一次拆分
+    result = bytearray(13 * count)
+    for k, column in enumerate(_regroup(columns[:2] + columns[3:], _K2D_PLAN)):
+        result[k::13] = column
+    result = result.translate(_bits2char64)
+    result[12::13] = b' ' * count
+    return result.decode('ascii').split()
+
+
+def _d2k_bulk(texts: list[str]) -> Optional[list[str]]:
+    """
+    批量转换 12 位的存档文件夹名，效果同 d2k，格式不符或结果不以 KU 开头时返回 None
+    与 _k2d_bulk 的过程相反：12 个 5 位的字符重新分为 10 个 6 位的字符，再插入下划线一列
+    """
+    count = len(texts)
+    if (columns := _columns(texts, 12, alphabet32)) is None:
+        return None
+    columns = _regroup(columns, _D2K_PLAN)
+    # KU -> 20 30
+    if columns[0] != bytes([20]) * count or columns[1] != bytes([30]) * count:
+        return None
+    result = bytearray(12 * count)
+    result[0::12], result[1::12], result[2::12] = columns[0], columns[1], bytes([63]) * count
+    for k, column in enumerate(columns[2:], 3):
+        result[k::12] = column
+    result = result.translate(_bits2char64)
+    result[11::12] = b' ' * count
+    return result.decode('ascii').split()
+
+
+def _many(texts: list[str], bulk, regular, single) -> list[str]:
+    if (result := bulk(texts)) is not None:
+        return result
+
+    # 有不规范的 id 时，规范的部分仍然批量处理
+    result = [None] * len(texts)
+    indexes = [i for i, text in enumerate(texts) if regular.fullmatch(text)]
+    for index, text in zip(indexes, bulk([texts[i] for i in indexes]) or ()):
+        result[index] = text
+    return [single(texts[i]) if text is None else text for i, text in enumerate(result)]
+
+
+# _many 的参数，(bulk, regular, single)
+_KLEIID = (_k2d_bulk, _kleiid_regular, k2d)
+_DIRNAME = (_d2k_bulk, _dirname_regular, d2k)
+
+
+def convert_many(texts: Iterable[str], id_type: arg_id_type = IDType.unknown) -> list[str]:
+    """
+    批量转换，结果与逐个调用 convert 一致，按传入顺序返回
+    规范格式的 kleiID(KU_XXXXXXXX) 与文件夹名(A7XXXXXXXXXX) 按批一次性转换，其它格式逐个交给 k2d/d2k 处理
+    """
+    if id_type not in (IDType.unknown, IDType.kleiID, IDType.dirname):
+        raise ValueError(f'id_type 应为 {list(IDType)} 之一或留空')
+
+    result = []
+    texts = iter(texts)
+    while batch := list(islice(texts, _BATCH)):
+        if id_type != IDType.unknown:
+            result.extend(_many(batch, *(_KLEIID if id_type == IDType.kleiID else _DIRNAME)))
+            continue
+        is_kleiid = list(map(str.startswith, batch, repeat('KU')))
+        # 整批都是同一种时不需要拆分
+        if (kleiids := is_kleiid.count(True)) in (0, len(batch)):
+            result.extend(_many(batch, *(_KLEIID if kleiids else _DIRNAME)))
+            continue
+
+        # 两种分别批量转换，再按 is_kleiid 依次从对应的结果中取出，保持原本的顺序
+        converted = (iter(_many(list(compress(batch, map(not_, is_kleiid))), *_DIRNAME)),
+                     iter(_many(list(compress(batch, is_kleiid)), *_KLEIID)))
+        result.extend(map(next, map(converted.__getitem__, is_kleiid)))
+    return result
+
+
 def test():
     from pydantic import BaseModel
 
@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
 """
+在仓库根目录下作为模块运行，klei_ids.json 从当前目录读取，参数为收集 id 的目录，默认为 path_ids
+    python -m klei_id.klei_id_statistics [目录]
+
 数据来源
 kuids               2021.02 - 2021.07  steam  in game
 kuids_steam_lobby   2023.08.24         steam  from lobby
@@ -19,11 +22,14 @@ KU 是一起生成的，还是生成八位后补的呢
 
 """
 
+import sys
+from collections import Counter
 from itertools import chain
-from pathlib import Path
 from pydantic import BaseModel
 from random import randint
-from re import findall
+
+from .harvest import harvest
+from .kuid_index import KUIDIndex
 
 path_ids = r'C:\Users\suke\Documents\python\dstserver\temp'
 alphabet = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-_'
@@ -36,38 +42,28 @@ class IDs(BaseModel):
     dirnames: list[str]
 
 
-with open('klei_ids.json', 'r', encoding='utf-8') as f_:
-    ids = IDs.model_validate_json(f_.read())
+# 运行时从 klei_ids.json 读取
+ids: IDs
 
 
-def collect_ids():
-    ids_ = []
-    for i in Path(path_ids).glob('*'):
-        with i.open('r', encoding='utf-8') as f:
-            ids_.extend(findall('KU_[0-9a-zA-Z-_]{8}', f.read()))
-    ids_ = list(set(ids_ + ids.kuids_lobby_steam))
+def load_ids(path: str = 'klei_ids.json') -> IDs:
+    with open(path, 'r', encoding='utf-8') as f_:
+        return IDs.model_validate_json(f_.read())
 
-    rule = {j: i for i, j in enumerate(alphabet)}
-    ids_.sort(key=lambda x: sum(rule[k] << ((7 - j) * 6) for j, k in enumerate(x[3:])))
 
-    kuids_lobby_steam = ids_
+def collect_ids(path: str = path_ids):
+    result = harvest(path, recursive=False)
+    for i in result.files:
+        print(f'{i.path.name}: {i.count} 次, {i.unique} 个, {i.mbps:.1f} MB/s', i.error or '')
+    # 去重并按字母表顺序排序
+    kuids_lobby_steam = result.index.union(KUIDIndex.from_kuids(ids.kuids_lobby_steam)).kuids()
     print(kuids_lobby_steam)
     print(len(kuids_lobby_steam))
 
 
 def split_ids():
-    result = {}
-    for i in chain(ids.kuids, ids.kuids_lobby_steam):
-        pre, suf = i[3:8], i[8:]
-        if pre in result:
-            result[pre].append(suf)
-        else:
-            result[pre] = [suf]
-
-    rules = {j: i for i, j in enumerate(alphabet)}
-    for j in result.values():
-        j.sort(key=lambda x: rules[x[0]] << 12 | rules[x[1]] << 6 | rules[x[2]])
-    kuids_split = result
+    # 按前五位分组，值为排好序的后三位
+    kuids_split = KUIDIndex.from_kuids(chain(ids.kuids, ids.kuids_lobby_steam)).split(5)
     print(kuids_split)
     print(len(kuids_split))
 
@@ -81,8 +77,8 @@ def test():
     print(f'共 {len(ids.kuids_lobby_steam + ids.kuids)} 个id， {len(ids.kuids_split)} 个键，其中 {len(special)} 个包含多个子项')
 
     # 统计id中KU_后首字母的分布情况
-    first_char = [i[0] for i in ids.kuids_split]
-    rr = {x: first_char.count(x) for x in alphabet}
+    first_char = Counter(i[0] for i in ids.kuids_split)
+    rr = {x: first_char[x] for x in alphabet}
     # print(rr)
     print(rr.values())
 
@@ -100,7 +96,8 @@ def update():
 
 
 if __name__ == "__main__":
-    collect_ids()
+    ids = load_ids()
+    collect_ids(sys.argv[1] if len(sys.argv) > 1 else path_ids)
     split_ids()
     # update()
     test()
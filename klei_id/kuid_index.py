@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+kleiID 的紧凑索引
+KU_ 后的 8 位字符通过 k2i 转为 48 位整数，去重排序后存放在 array('Q') 中，每个 id 只占 8 字节
+整数的大小顺序与字母表顺序一致，前缀相同的 id 在数组中是连续的，前缀、范围查询都可以二分完成
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from itertools import repeat
+from operator import rshift
+from os import PathLike
+from pathlib import Path
+from struct import Struct
+from sys import byteorder
+from typing import Iterable, Iterator, Union
+
+from .klei_id import i2k_many, k2i, k2i_many
+
+# 魔数(4) + 版本(2) + 数量(8)，之后是小端存储的 uint64 数组
+_HEADER = Struct('<4sHQ')
+_MAGIC = b'KUID'
+_VERSION = 1
+
+
+def _prefix_value(prefix: str) -> tuple[int, int]:
+    """返回前缀对应的整数值，以及前缀之后剩余的位数"""
+    prefix = prefix.removeprefix('KU_')
+    shift = (8 - len(prefix)) * 6
+    try:
+        # 补 0（值为 0 的字符）到 8 位后整体转换
+        return k2i('KU_' + prefix.ljust(8, '0')) >> shift, shift
+    except ValueError:
+        raise ValueError(f'{prefix} 不是合法的 kleiID 前缀') from None
+
+
+class KUIDIndex:
+
+    def __init__(self, numbers: Iterable[int] = ()):
+        # 先排序再去重，比对 set 排序快得多
+        self._data = array('Q', dict.fromkeys(sorted(numbers)))
+
+    @classmethod
+    def _from_sorted(cls, numbers: array) -> 'KUIDIndex':
+        """numbers 已经有序且不重复时，直接使用，不再排序"""
+        index = cls()
+        index._data = numbers
+        return index
+
+    @classmethod
+    def from_kuids(cls, kuids: Iterable[str]) -> 'KUIDIndex':
+        return cls(k2i_many(kuids))
+
+    @property
+    def data(self) -> array:
+        """有序且不重复的 48 位整数"""
+        return self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.kuids())
+
+    def __contains__(self, kuid: Union[str, int]) -> bool:
+        number = k2i(kuid) if isinstance(kuid, str) else kuid
+        index = bisect_left(self._data, number)
+        return index < len(self._data) and self._data[index] == number
+
+    def __repr__(self):
+        return f'<KUIDIndex: {len(self)}>'
+
+    def kuids(self) -> list[str]:
+        return i2k_many(self._data)
+
+    def union(self, other: Union['KUIDIndex', Iterable[int]]) -> 'KUIDIndex':
+        return KUIDIndex(self._data + array('Q', other.data if isinstance(other, KUIDIndex) else other))
+
+    def prefix_range(self, prefix: str) -> tuple[int, int]:
+        """以 prefix 开头的 id 在数组中的下标范围 [start, stop)，prefix 可以带 KU_"""
+        value, shift = _prefix_value(prefix)
+        return bisect_left(self._data, value << shift), bisect_left(self._data, (value + 1) << shift)
+
+    def with_prefix(self, prefix: str) -> list[str]:
+        start, stop = self.prefix_range(prefix)
+        return KUIDIndex._from_sorted(self._data[start:stop]).kuids()
+
+    def between(self, low: str, high: str) -> list[str]:
+        """low <= id <= high 的所有 id"""
+        start, stop = bisect_left(self._data, k2i(low)), bisect_right(self._data, k2i(high))
+        return KUIDIndex._from_sorted(self._data[start:stop]).kuids()
+
+    def prefix_histogram(self, length: int) -> dict[str, int]:
+        """按 KU_ 后前 length 个字符分组计数"""
+        counter = Counter(map(rshift, self._data, repeat((8 - length) * 6)))
+        return {kuid[11 - length:]: count for kuid, count in zip(i2k_many(counter), counter.values())}
+
+    def split(self, length: int) -> dict[str, list[str]]:
+        """按 KU_ 后前 length 个字符分组，值为剩余的字符，已排序"""
+        result = {}
+        for kuid in i2k_many(self._data):
+            if (prefix := kuid[3:3 + length]) in result:
+                result[prefix].append(kuid[3 + length:])
+            else:
+                result[prefix] = [kuid[3 + length:]]
+        return result
+
+    def save(self, path: Union[str, PathLike]):
+        data = self._data
+        if byteorder == 'big':
+            data = array('Q', data)
+            data.byteswap()
+        with Path(path).open('wb') as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, len(data)))
+            data.tofile(f)
+
+    @classmethod
+    def load(cls, path: Union[str, PathLike]) -> 'KUIDIndex':
+        with Path(path).open('rb') as f:
+            magic, version, count = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError(f'不是 KUIDIndex 保存的文件 {path}')
+            index = cls()
+            index._data.fromfile(f, count)
+        if byteorder == 'big':
+            index._data.byteswap()
+        return index
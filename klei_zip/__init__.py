@@ -1,2 +1,15 @@
 # -*- coding: utf-8 -*-
-from .persistent_string import decode_unzip as decode, zip_encode as encode
+from .persistent_string import (
+    decode_unzip as decode,
+    zip_encode as encode,
+    decode_stream,
+    decode_bytes,
+    encode_bytes,
+    parse_header,
+    KleiHeader,
+    MODE_ZIP,
+    MODE_RAW
+)
+from .batch import decode_many, encode_many
+from .scanner import scan, inspect, PersistentFile
+from .cache import CodecCache
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+批量编码、解码
+zlib 压缩等级为 9 时编码是 CPU 密集的，这里将任务分发到进程池（或线程池，zlib 运行时会释放 GIL）中并行处理
+传入的 str 视为待处理的数据本身，os.PathLike（如 pathlib.Path）视为文件路径，会读取文件内容后处理
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from os import PathLike
+from pathlib import Path
+from typing import Iterable, Literal, Union
+
+from .persistent_string import decode_unzip, zip_encode
+
+arg_item = Union[str, PathLike]
+arg_executor = Literal['process', 'thread']
+
+
+def _read(item: arg_item) -> str:
+    if isinstance(item, PathLike):
+        return Path(item).read_text(encoding='utf-8')
+    return item
+
+
+def _decode_item(item: arg_item) -> str:
+    return decode_unzip(_read(item))
+
+
+def _encode_item(item: arg_item, encode: bool = True) -> str:
+    return zip_encode(_read(item), encode)
+
+
+def _map(fn, items: Iterable[arg_item], workers: int, chunksize: int, executor: arg_executor) -> list[str]:
+    items = list(items)
+    if workers == 1 or len(items) <= 1:
+        return [fn(i) for i in items]
+
+    match executor:
+        case 'process':
+            pool: Executor = ProcessPoolExecutor(workers)
+        case 'thread':
+            pool = ThreadPoolExecutor(workers)
+        case _:
+            raise ValueError(f"executor 应为 'process' 或 'thread'，而不是 {executor!r}")
+
+    with pool:
+        # 结果的顺序与传入顺序一致
+        return list(pool.map(fn, items, chunksize=chunksize))
+
+
+def decode_many(items: Iterable[arg_item], workers: int = None, chunksize: int = 16,
+                executor: arg_executor = 'process') -> list[str]:
+    """
+    并行解码，按传入顺序返回结果
+    workers 为并行数，默认与 CPU 核心数一致，为 1 时直接在当前线程中处理
+    chunksize 为进程池每次分配给单个进程的任务数，使用线程池时忽略
+    """
+    return _map(_decode_item, items, workers, chunksize, executor)
+
+
+def encode_many(items: Iterable[arg_item], encode: bool = True, workers: int = None, chunksize: int = 16,
+                executor: arg_executor = 'process') -> list[str]:
+    """并行编码，参数同 decode_many，encode 同 zip_encode"""
+    return _map(partial(_encode_item, encode=encode), items, workers, chunksize, executor)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+编码、解码的一致性验证与性能测试，结果以 json 输出，便于对比不同版本
+    python -m klei_zip.benchmark
+    python -m klei_zip.benchmark --sizes 1 4096 16777216 --levels 1 6 9 --output bench.json
+
+一致性：persistent_example 中记录的游戏输出必须与 zip_encode 的结果逐字节一致
+性能：不同数据大小、压缩等级下的编码/解码吞吐量（MB/s，按原始数据大小计）与单次耗时的分位数
+只有压缩等级 9 的结果与游戏一致，其它等级仅作对比
+"""
+
+from argparse import ArgumentParser
+from json import dumps
+from random import Random
+from zlib import ZLIB_RUNTIME_VERSION
+
+from .persistent_example import var, var_long
+from .persistent_string import decode_unzip, zip_encode, encode_bytes, decode_bytes, _zip
+from .timing import measure, percentiles
+
+# 1 字节至 1x64^4+1
+SIZES = (1, 64, 64 ** 2 - 1, 64 ** 2, 64 ** 2 + 1, 64 ** 3, 64 ** 4 - 1, 64 ** 4, 64 ** 4 + 1)
+LEVELS = (1, 6, 9)
+
+# 数据越大重复次数越少，单项测试的数据总量大约在这个范围内
+_BUDGET = 1 << 26
+
+
+def conformance() -> dict:
+    """验证 zip_encode/decode_unzip 与游戏的输出一致"""
+    failed = []
+    for raw, encoded in var.items():
+        if zip_encode(raw) != encoded or decode_unzip(encoded) != raw.split('\x00')[0]:
+            failed.append(repr(raw))
+
+    for (char, count), expected in var_long.items():
+        raw = char * count
+        encoded = zip_encode(raw)
+        if isinstance(expected, tuple):
+            prefix, suffix, length = expected
+            same = encoded.startswith(prefix) and encoded.endswith(suffix) and len(encoded) == length
+        else:
+            same = encoded == expected
+        if not same or decode_unzip(encoded) != raw:
+            failed.append(f'{char}x{count}')
+
+    return {
+        'zlib': ZLIB_RUNTIME_VERSION,
+        'total': len(var) + len(var_long),
+        'failed': failed,
+    }
+
+
+def payload(size: int, seed: int = 0) -> bytes:
+    """生成与存档类似的 lua 代码作为测试数据"""
+    rand = Random(seed)
+    words = ('return', 'x', 'z', 'data', 'prefab', 'true', 'false', 'nil', 'ents', 'skinname', 'health')
+    chunks, length = [], 0
+    while length < size:
+        chunk = f'{rand.choice(words)}={{{rand.randint(-1000, 1000)},{rand.random():.3f}}},'
+        chunks.append(chunk)
+        length += len(chunk)
+    return ''.join(chunks).encode('ascii')[:size]
+
+
+def _encode(data: bytes, level: int) -> bytes:
+    if level == 9:
+        return encode_bytes(data)
+    return _zip(memoryview(data), level)
+
+
+def bench(sizes=SIZES, levels=LEVELS, repeat: int = 50) -> list[dict]:
+    """单项结果中的耗时单位为微秒"""
+    results = []
+    for size in sizes:
+        data = payload(size)
+        count = max(3, min(repeat, _BUDGET // max(size, 1)))
+        for level in levels:
+            encoded = _encode(data, level)
+            if decode_bytes(encoded) != data:
+                raise ValueError(f'解码结果与原始数据不一致 size={size} level={level}')
+
+            times_encode = measure(lambda x: _encode(x, level), data, count)
+            times_decode = measure(decode_bytes, encoded, count)
+            results.append({
+                'size': size,
+                'level': level,
+                'byte_exact': level == 9,
+                'encoded_size': len(encoded),
+                'repeat': count,
+                'encode_mbps': size * count / sum(times_encode) * 1e3,
+                'decode_mbps': size * count / sum(times_decode) * 1e3,
+                'encode_us': percentiles(times_encode, 1e3),
+                'decode_us': percentiles(times_decode, 1e3),
+            })
+    return results
+
+
+def main():
+    parser = ArgumentParser(prog='python -m klei_zip.benchmark', description='klei_zip 一致性验证与性能测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--levels', type=int, nargs='+', default=LEVELS)
+    parser.add_argument('--repeat', type=int, default=50, help='单项最多重复次数')
+    parser.add_argument('--output', help='结果保存路径，默认输出到标准输出')
+    args = parser.parse_args()
+
+    report = {'conformance': conformance(), 'bench': bench(args.sizes, args.levels, args.repeat)}
+    text = dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    if report['conformance']['failed']:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
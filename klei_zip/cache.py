@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+zip_encode/decode_unzip 的缓存
+默认模组配置、会话字符串等内容会被反复编码，以输入内容的哈希为键缓存结果，重复的输入只需要查一次字典
+"""
+
+from collections import OrderedDict
+from hashlib import blake2b
+from threading import Lock
+from typing import NamedTuple
+
+from .persistent_string import decode_unzip, zip_encode
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+    maxbytes: int
+    nbytes: int
+
+
+class CodecCache:
+    """
+    LRU 缓存，条目数不超过 maxsize，缓存结果的总长度不超过 maxbytes（按字符数计）
+    键为 blake2b 哈希，只与输入内容有关
+    """
+
+    def __init__(self, maxsize: int = 1024, maxbytes: int = 1 << 24):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+
+        self._data: OrderedDict[bytes, str] = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def _key(tag: bytes, string: str) -> bytes:
+        return tag + blake2b(string.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+    def _get(self, key: bytes, fn, *args) -> str:
+        with self._lock:
+            if (result := self._data.get(key)) is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        result = fn(*args)
+        if len(result) > self.maxbytes:
+            return result
+
+        with self._lock:
+            if key not in self._data:
+                self._data[key] = result
+                self.nbytes += len(result)
+                while len(self._data) > self.maxsize or self.nbytes > self.maxbytes:
+                    self.nbytes -= len(self._data.popitem(last=False)[1])
+        return result
+
+    def encode(self, string: str, encode: bool = True) -> str:
+        """同 zip_encode"""
+        return self._get(self._key(b'E' if encode else b'R', string), zip_encode, string, encode)
+
+    def decode(self, string: str) -> str:
+        """同 decode_unzip"""
+        return self._get(self._key(b'D', string), decode_unzip, string)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.nbytes = 0
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data), self.maxbytes, self.nbytes)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f'<CodecCache: {self.info()}>'
@@ -54,6 +54,18 @@ var = {
     # "1x64^4":          "KLEI     1DAQAAABAAAAAAAAABvT8AAHja7MGBAAAA  AMBVQaXfHw== 全长21791，只取了前后缀。这两项省略的部分完全相同",
     # "1x64^4+1":        "KLEI     1DAQAAABAAAAABAAABvT8AAHja7MGBAAAA  AMBWIQTfUA== 全长21791，只取了前后缀。这两项省略的部分完全相同",
 }
+# 较长的数据，键为 (重复的字符, 重复次数)
+# 1x64^4 附近的结果全长 21791，只记录了 (前缀, 后缀, 全长)
+var_long = {
+    ('1', 33): "KLEI     1DAQAAABAAAAAhAAAACwAAAHjaMzQkAABrggZS",
+    ('1', 65): "KLEI     1DAQAAABAAAABBAAAADAAAAHjaMzSkEAAAmuEMcg==",
+    ('1', 64 ** 2 - 1): "KLEI     1DAQAAABAAAAD/DwAAHAAAAHja7cEBDQAAAMKgTO9fzh4OKAAAAODcAPdwD/0=",
+    ('1', 64 ** 2): "KLEI     1DAQAAABAAAAAAEAAAHAAAAHja7cEBDQAAAMKgTO9fzh4OKAAAAODdAAetEC4=",
+    ('1', 64 ** 2 + 1): "KLEI     1DAQAAABAAAAABEAAAHAAAAHja7cEBDQAAAMKgTO9fzh4OKAAAAODeABgMEF8=",
+    ('1', 64 ** 4 - 1): ("KLEI     1DAQAAABAAAAD///8AvT8AAHja7MGBAAAA", "AMBUYnfe7g==", 21791),
+    ('1', 64 ** 4): ("KLEI     1DAQAAABAAAAAAAAABvT8AAHja7MGBAAAA", "AMBVQaXfHw==", 21791),
+    ('1', 64 ** 4 + 1): ("KLEI     1DAQAAABAAAAABAAABvT8AAHja7MGBAAAA", "AMBWIQTfUA==", 21791),
+}
 tt = {}
 for key, value in var.items():
     # tt[key] = '\\x' + b64decode(value[11:31]).hex('~').replace('~', '\\x')
@@ -1,20 +1,177 @@
 # -*- coding: utf-8 -*-
 
-from base64 import b64decode, b64encode
-from zlib import compress, decompress
+from base64 import b64decode
+from binascii import a2b_base64, b2a_base64
+from codecs import getincrementaldecoder
+from functools import partial
+from itertools import chain
+from re import compile as re_compile
+from struct import Struct
+from typing import Iterable, Iterator, NamedTuple, Optional, Union
+from zlib import compress, decompress, decompressobj
+
+# 流式解码时，每次从文件对象读取的字节数
+CHUNK_SIZE = 1 << 16
+
+# 'KLEI     1D' 压缩并经 base64 编码    'KLEI     1 ' 未编码
+MODE_ZIP = '1D'
+MODE_RAW = '1 '
+
+# 前缀(8) + 压缩前字符长度(4) + 压缩后字符长度(4)
+_HEADER = Struct('<QII')
+_HEADER_PREFIX = 0x1000000001
+
+# 在 c 中 \x00 作为结束符
+_NUL = re_compile(b'\x00')
+
+
+class KleiHeader(NamedTuple):
+    # MODE_ZIP 或 MODE_RAW
+    mode: str
+
+    # 以下仅在 MODE_ZIP 时有值
+    # 固定为 0x1000000001
+    prefix: Optional[int] = None
+
+    # 压缩前的字节数
+    len_raw: Optional[int] = None
+
+    # 压缩后的字节数
+    len_zip: Optional[int] = None
+
+
+def _payload_len(data: Union[str, bytes], start: int) -> int:
+    """base64 部分解码后的字节数，忽略末尾的换行与 \\x00"""
+    end = len(data)
+    while end > start and data[end - 1] in ('\x00', '\r', '\n', 0, 10, 13):
+        end -= 1
+    padding = 0
+    while padding < 2 and end - padding > start and data[end - padding - 1] in ('=', 61):
+        padding += 1
+    return (end - start) // 4 * 3 - padding
+
+
+def parse_header(data: Union[str, bytes], verify: bool = True) -> KleiHeader:
+    """
+    只解码开头 24 个 base64 字符，读取 zip_encode 写入的头部信息，不解压数据
+    data 可以是 str，也可以是 bytes/memoryview（如 mmap 的切片）
+    verify 为真时，检查前缀以及记录的压缩后长度与实际数据长度是否一致，不一致时抛出 ValueError
+    """
+    if data[:11] in ('KLEI     1 ', b'KLEI     1 '):
+        return KleiHeader(MODE_RAW)
+    start = 11 if data[:11] in ('KLEI     1D', b'KLEI     1D') else 0
+    if data[start:start + 8] not in ('AQAAABAA', b'AQAAABAA'):
+        raise ValueError('传入数据不是 klei 编码的字符串')
+
+    head = data[start:start + 24]
+    prefix, len_raw, len_zip = _HEADER.unpack_from(a2b_base64(head))
+    if verify:
+        if prefix != _HEADER_PREFIX:
+            raise ValueError(f'头部前缀错误 {prefix:#x}')
+        if (len_data := _payload_len(data, start)) != _HEADER.size + len_zip:
+            raise ValueError(f'头部记录的压缩后长度为 {len_zip}，实际为 {len_data - _HEADER.size}')
+    return KleiHeader(MODE_ZIP, prefix, len_raw, len_zip)
+
+
+def _check_len(len_raw: int, len_real: int):
+    if len_raw != len_real:
+        raise ValueError(f'头部记录的压缩前长度为 {len_raw}，实际解压得到 {len_real}')
+
+
+def _unzip(data_full: bytes) -> bytes:
+    """按头部记录的压缩前长度一次性分配输出缓冲区并解压，长度不一致时抛出 ValueError"""
+    _, len_raw, _ = _HEADER.unpack_from(data_full)
+    str_encode = decompress(memoryview(data_full)[_HEADER.size:], bufsize=max(len_raw, 1))
+    _check_len(len_raw, len(str_encode))
+    return str_encode
 
 
 def decode_unzip(string: str) -> str:
     if string.startswith('KLEI     1D'):
         string = string[11:]
     if string.startswith('AQAAABAA'):  # AQAAABAA -> \x01\x00\x00\x00\x10\x00
-        data_full = b64decode(string)
-        data_zip = data_full[16:]
-        str_encode = decompress(data_zip)
-        string = str_encode.decode('utf-8')
+        string = _unzip(b64decode(string)).decode('utf-8')
     return string
 
 
+def _iter_chunks(source, chunk_size: int) -> Iterator[bytes]:
+    """将文件对象、str/bytes 或它们的可迭代对象统一为 bytes 分块"""
+    if isinstance(source, (str, bytes, bytearray, memoryview)):
+        source = (source,)
+    elif hasattr(source, 'read'):
+        source = iter(partial(source.read, chunk_size), source.read(0))
+    for chunk in source:
+        yield chunk.encode('utf-8') if isinstance(chunk, str) else bytes(chunk)
+
+
+def decode_stream(source: Union[Iterable[Union[str, bytes]], str, bytes],
+                  chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """
+    decode_unzip 的流式版本，结果拼接后与 decode_unzip 一致
+    source 可以是文件对象（文本或二进制模式均可），也可以是 str/bytes 分块的可迭代对象
+    base64 按 4 字符对齐逐块解码后送入 zlib.decompressobj，逐块产出 utf-8 文本，内存占用与输入大小无关
+    """
+    chunks = _iter_chunks(source, chunk_size)
+    text = getincrementaldecoder('utf-8')()
+
+    # 先攒够 KLEI 前缀 + AQAAABAA 的长度，用于判断格式
+    head = bytearray()
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= 19:
+            break
+    if head.startswith(b'KLEI     1D'):
+        del head[:11]
+    if not head.startswith(b'AQAAABAA'):
+        # 未压缩的数据原样输出，与 decode_unzip 保持一致
+        for chunk in chain((head,), chunks):
+            if out := text.decode(chunk):
+                yield out
+        if out := text.decode(b'', True):
+            yield out
+        return
+
+    unzip = decompressobj()
+    # rest: 尚未凑齐 4 字符的 base64 数据    skip: 还需跳过的头部字节数（前缀 8 + 长度信息 8）
+    # header: 头部信息    len_real: 已解压的字节数
+    rest, header, len_real = bytearray(), bytearray(), 0
+    for chunk in chain((head,), chunks):
+        # 游戏写出的数据中没有空白，但文件末尾可能有换行或 \x00
+        rest += chunk.translate(None, b'\r\n\t \x00')
+        cut = len(rest) - len(rest) % 4
+        if not cut:
+            continue
+        data = a2b_base64(rest[:cut])
+        del rest[:cut]
+        if (skip := _HEADER.size - len(header)) > 0:
+            header += data[:skip]
+            data = data[skip:]
+        len_real += len(str_encode := unzip.decompress(data))
+        if out := text.decode(str_encode):
+            yield out
+    if rest:
+        raise ValueError('base64 数据长度不完整')
+    if not unzip.eof:
+        raise ValueError('压缩数据不完整')
+    len_real += len(str_encode := unzip.flush())
+    _check_len(_HEADER.unpack(header)[1], len_real)
+    if out := text.decode(str_encode, True):
+        yield out
+
+
+def _zip(data: memoryview, level: int = 9) -> bytes:
+    # klei 使用 1.2.3 版本（2005）的 zlib，压缩等级是 9，其它等级只用于性能对比
+    data_zip = compress(data, level)
+
+    # klei 的做法是：分配内存，前十六字节存放自定义数据，之后存放压缩后数据
+    # 自定义数据：前八字节放 0x1000000001i64，后八字节放长度信息（低四：原字符串长度，高四：压缩后字符串长度）
+    # '' -> \x01\x00\x00\x00\x10\x00\x00\x00 + \x00\x00\x00\x00 \x08\x00\x00\x00 + \x78\xda\x03\x00\x00\x00\x00\x01
+    # 前缀(8) + 压缩前字符长度(4) + 压缩后字符长度(4) + 压缩后数据
+    data_full = _HEADER.pack(_HEADER_PREFIX, len(data), len(data_zip)) + data_zip
+
+    return b'KLEI     1D' + b2a_base64(data_full, newline=False)
+
+
 def zip_encode(string: str, encode: bool = True) -> str:
     """
     通过 zlib 对原始字符串进行压缩，在添加数据信息后，返回经过 base64 编码后的新字符串
@@ -24,29 +181,37 @@ def zip_encode(string: str, encode: bool = True) -> str:
         string = string[:flag]
 
     if encode:
-        str_encode = string.encode('utf-8')
-
-        # klei 使用 1.2.3 版本（2005）的 zlib，压缩等级是 9
-        data_zip = compress(str_encode, 9)
-
-        len_str = len(str_encode).to_bytes(4, byteorder='little')
-        len_zip = len(data_zip).to_bytes(4, byteorder='little')
-        # klei 的做法是：分配内存，前十六字节存放自定义数据，之后存放压缩后数据
-        # 自定义数据：前八字节放 0x1000000001i64，后八字节放长度信息（低四：原字符串长度，高四：压缩后字符串长度）
-        # '' -> \x01\x00\x00\x00\x10\x00\x00\x00 + \x00\x00\x00\x00 \x08\x00\x00\x00 + \x78\xda\x03\x00\x00\x00\x00\x01
-        # 前缀(8) + 压缩前字符长度(4) + 压缩后字符长度(4) + 压缩后数据
-        data_full = 0x1000000001.to_bytes(8, byteorder='little') + len_str + len_zip + data_zip
-
-        data_b64 = b64encode(data_full)
-        str_new = data_b64.decode('ascii')
-        result = 'KLEI     1D' + str_new
+        result = _zip(memoryview(string.encode('utf-8'))).decode('ascii')
     else:
         result = 'KLEI     1 ' + string
     return result
 
 
-def verify_algorithm():
-    from persistent_example import var
+def decode_bytes(data: bytes) -> bytes:
+    """
+    decode_unzip 的 bytes 版本，data 可以是 bytes/bytearray/memoryview（如 mmap 的切片）
+    返回 utf-8 编码的结果，全程不经过 str。未压缩的数据直接返回切片，传入 memoryview 时不会复制
+    """
+    if data[:11] == b'KLEI     1D':
+        data = data[11:]
+    if data[:8] == b'AQAAABAA':
+        data = _unzip(a2b_base64(data))
+    return data
+
+
+def encode_bytes(data: bytes, encode: bool = True) -> bytes:
+    """zip_encode 的 bytes 版本，data 为 utf-8 编码的原始数据，可以是任意 bytes-like 对象"""
+    data = memoryview(data).cast('B')
+    if match := _NUL.search(data):
+        data = data[:match.start()]
+
+    if encode:
+        return _zip(data)
+    return b'KLEI     1 ' + data
+
+
+def verify_algorithm() -> tuple[list[str], list[str]]:
+    from .persistent_example import var
     succ, fail = [], []
     for i in var:
         if zip_encode(i) == var[i]:
@@ -54,6 +219,7 @@ def verify_algorithm():
             continue
         fail.append(i)
     print(f'验证结果：\n\t结果一致：{len(succ)}\n\t结果不一致：{fail}')
+    return succ, fail
 
 
 if __name__ == "__main__":
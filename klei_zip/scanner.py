@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+扫描 client_save、save 等目录下的持久化文件
+通过 mmap 只读取文件头部与末尾，判断格式并解析头部信息，解码推迟到调用 decode 时进行
+"""
+
+from mmap import mmap, ACCESS_READ
+from os import PathLike
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional, Union
+
+from .persistent_string import KleiHeader, MODE_RAW, MODE_ZIP, decode_bytes, parse_header
+
+
+class PersistentFile(NamedTuple):
+    path: Path
+
+    # MODE_ZIP、MODE_RAW，未经 klei 编码的普通文件为 None
+    mode: Optional[str]
+
+    # 仅 MODE_ZIP 时有值
+    header: Optional[KleiHeader]
+
+    # 头部校验失败的原因，正常时为 None
+    error: Optional[str] = None
+
+    def decode(self) -> str:
+        """读取并解码文件，结果与 decode_unzip(文件内容) 一致"""
+        with self.path.open('rb') as file:
+            if not self.path.stat().st_size:
+                return ''
+            with mmap(file.fileno(), 0, access=ACCESS_READ) as mm:
+                return str(decode_bytes(memoryview(mm)), 'utf-8')
+
+
+def inspect(path: Union[str, PathLike], verify: bool = True) -> PersistentFile:
+    """判断单个文件的格式并解析头部信息，不解压数据"""
+    path = Path(path)
+    with path.open('rb') as file:
+        if not path.stat().st_size:
+            return PersistentFile(path, None, None)
+        with mmap(file.fileno(), 0, access=ACCESS_READ) as mm, memoryview(mm) as view:
+            if view[:11] == b'KLEI     1 ':
+                return PersistentFile(path, MODE_RAW, None)
+            if view[:11] != b'KLEI     1D' and view[:8] != b'AQAAABAA':
+                return PersistentFile(path, None, None)
+            try:
+                return PersistentFile(path, MODE_ZIP, parse_header(view, verify))
+            except ValueError as e:
+                return PersistentFile(path, MODE_ZIP, None, str(e))
+
+
+def scan(directory: Union[str, PathLike], pattern: str = '*', recursive: bool = True,
+         verify: bool = True) -> Iterator[PersistentFile]:
+    """
+    遍历目录下匹配 pattern 的文件，逐个产出 PersistentFile
+    verify 同 parse_header，头部校验失败的文件不会中断扫描，原因记录在 error 中
+    """
+    directory = Path(directory)
+    if not directory.is_dir():
+        raise ValueError(f'路径指向的不是文件夹 {directory.absolute()}')
+
+    for path in directory.rglob(pattern) if recursive else directory.glob(pattern):
+        if path.is_file():
+            yield inspect(path, verify)
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""
+性能测试共用的计时工具，klei_zip.benchmark 与 savedata.benchmark 都使用这里的函数
+"""
+
+from time import perf_counter_ns
+
+
+def measure(fn, arg, repeat: int) -> list[int]:
+    """调用 fn(arg) repeat 次，返回每次的耗时，单位纳秒"""
+    times = []
+    for _ in range(repeat):
+        start = perf_counter_ns()
+        fn(arg)
+        times.append(perf_counter_ns() - start)
+    return times
+
+
+def percentiles(samples: list[int], unit: float) -> dict:
+    """耗时的 p50、p90、p99，unit 为结果单位对应的纳秒数，例如微秒为 1e3，毫秒为 1e6"""
+    samples = sorted(samples)
+    return {f'p{p}': samples[min(len(samples) - 1, len(samples) * p // 100)] / unit for p in (50, 90, 99)}
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+lua_parser 与 lupa 解析存档的一致性验证与性能测试，结果以 json 输出，便于对比不同版本
+    python -m savedata.benchmark
+    python -m savedata.benchmark --ents 1000 40000 --repeat 3 --output bench.json
+
+一致性：生成的存档及 CASES 中的代码，lua_parser 的结果必须与 lupa 运行后经 Converter 转换的结果一致，没有安装 lupa 时跳过
+性能：不同实例数量的存档，完整解析（native_full / lupa_full）与只读取 meta（native_meta）的单次耗时的分位数，单位毫秒
+旧格式地图：tiles 与 tiledata 按字节拆分（split）与原本逐个 iter_unpack 再分别解码两次（unpack）的耗时，结果必须一致
+"""
+
+from argparse import ArgumentParser
+from base64 import b64decode, b64encode
+from json import dumps
+from random import Random
+from struct import iter_unpack
+
+from klei_zip.timing import measure, percentiles
+
+from .map import convert_oldtiledata, convert_oldtiles
+from .map.tiles_like_parser import split_planes
+from .savedata import SECTIONS
+from .utils.lua_parser import load, loads
+from .utils.lua_runtime import created, execute, lupa
+from .utils.table2dict import Converter
+
+ENTS = (1000, 10000, 40000)
+
+# 存档中会出现的各种写法
+CASES = (
+    'return {}',
+    'return {1, 2.5, -3, 1e3, 0x10, .5, "a", \'b\', [[c]], [==[d]]e]==], true, false}',
+    'return {a=nil, b=1, [1]="x", [2.5]=2, ["k"]={}, -- comment\n c={{}, {x=1}}; d=-0.0}',
+    'return {s="\\65\\t\\"\\228\\184\\173\\\n", n=9007199254740993, f=1e300}',
+    'local function a() return {x=1} end\nlocal b = {y=2}\nreturn {a=a(), b=b, c=a()}',
+)
+
+
+def savedata(ents: int, seed: int = 0, functions: bool = True) -> str:
+    """
+    生成与存档结构类似的 lua 代码
+    functions 为 True 时与 2021.08.12 之后的存档一样，按项生成函数
+    """
+    rand = Random(seed)
+    tiles = b64encode(b'VRSN\x00\x01\x00\x00\x00' + rand.randbytes(2 * 425 * 425)).decode('ascii')
+    prefabs = ('evergreen', 'rock1', 'grass', 'sapling', 'flower', 'berrybush', 'spiderden', 'rabbithole')
+    groups = {}
+    for i in range(ents):
+        data = ''
+        if rand.random() < .5:
+            data = (f',data={{growable={{stage={rand.randint(1, 4)},time={rand.random() * 100:.3f}}},'
+                    f'burnable={{burning=false}},skinname="skin_{i}"}}')
+        groups.setdefault(rand.choice(prefabs), []).append(
+            f'{{x={rand.uniform(-800, 800):.2f},z={rand.uniform(-800, 800):.2f}{data}}}')
+
+    items = {
+        'map': f'{{tiles="{tiles}",prefab="forest",width=425,height=425,persistdata={{worldstate={{season="autumn"}}}}}}',
+        'meta': '{saveversion=5.1,build="600000",seed=1234}',
+        'world_network': '{persistdata={}}',
+        'mods': '{}',
+    }
+    if not functions:
+        items['ents'] = '{' + ','.join(f'{k}={{{",".join(v)}}}' for k, v in groups.items()) + '}'
+        return 'return {' + ','.join(f'{k}={v}' for k, v in items.items()) + '}'
+
+    # 每种实例单独一个函数，避免单个函数中的常量超出 lua 的限制
+    items.update((f'ents_{k}', '{' + ','.join(v) + '}') for k, v in groups.items())
+    items['ents'] = '{' + ','.join(f'{k}=ents_{k}()' for k in groups) + '}'
+    return ''.join(f'local function {k}() return {v} end\n' for k, v in items.items()) + \
+        'return {' + ','.join(f'{k}={k}()' for k in SECTIONS if k in items) + '}'
+
+
+def _lupa(text: str):
+    return Converter().table_dict(execute(text))
+
+
+def conformance() -> dict:
+    if lupa is None:
+        return {'lupa': None, 'total': 0, 'failed': []}
+
+    failed = []
+    texts = list(CASES) + [savedata(200, seed, functions) for seed in range(3) for functions in (True, False)]
+    for text in texts:
+        if loads(text) != _lupa(text):
+            failed.append(text[:60])
+    return {'lupa': lupa.LuaRuntime().lua_implementation, 'total': len(texts), 'failed': failed}
+
+
+def bench(ents=ENTS, repeat: int = 5) -> list[dict]:
+    results = []
+    for count in ents:
+        text = savedata(count)
+        result = {
+            'ents': count,
+            'size': len(text),
+            'repeat': repeat,
+            'native_full_ms': percentiles(measure(loads, text, repeat), 1e6),
+            'native_meta_ms': percentiles(measure(lambda x: load(x)['meta'], text, repeat), 1e6),
+        }
+        if lupa is not None:
+            result['lupa_full_ms'] = percentiles(measure(_lupa, text, repeat), 1e6)
+        results.append(result)
+    return results
+
+
+def _unpack_legacy(tiles: str) -> tuple[list[int], list[int]]:
+    """拆分前的实现，每层各自解码一次，每块地皮生成一个 tuple"""
+    return ([i[0] for i in iter_unpack('<2B', b64decode(tiles)[9:])],
+            [i[1] for i in iter_unpack('<2B', b64decode(tiles)[9:])])
+
+
+def _split_legacy(tiles: str) -> tuple:
+    # 与 OldMap 一样，解码、拆分一次，两层共用
+    planes = split_planes(tiles)
+    return convert_oldtiles(planes), convert_oldtiledata(planes)
+
+
+def legacy_map(size: int = 425, repeat: int = 5) -> dict:
+    tiles = b64encode(b'VRSN\x00\x01\x00\x00\x00' + Random(0).randbytes(2 * size * size)).decode('ascii')
+    split = _split_legacy(tiles)
+    if [i.tolist() for i in split] != list(_unpack_legacy(tiles)):
+        raise ValueError(f'拆分结果与 iter_unpack 不一致 size={size}')
+    return {
+        'size': size,
+        'repeat': repeat,
+        'unpack_ms': percentiles(measure(_unpack_legacy, tiles, repeat), 1e6),
+        'split_ms': percentiles(measure(_split_legacy, tiles, repeat), 1e6),
+    }
+
+
+def main():
+    parser = ArgumentParser(prog='python -m savedata.benchmark', description='lua_parser 一致性验证与性能测试')
+    parser.add_argument('--ents', type=int, nargs='+', default=ENTS, help='生成的存档中实例的数量')
+    parser.add_argument('--map-size', type=int, default=425, help='旧格式地图的边长')
+    parser.add_argument('--repeat', type=int, default=5, help='单项重复次数')
+    parser.add_argument('--output', help='结果保存路径，默认输出到标准输出')
+    args = parser.parse_args()
+
+    report = {
+        'conformance': conformance(),
+        'bench': bench(args.ents, args.repeat),
+        'legacy_map': legacy_map(args.map_size, args.repeat),
+        'lua_runtime_created': created(),
+    }
+    text = dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    if report['conformance']['failed']:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+"""
+存档 ents 中的实例
+ents 的格式为 {prefab: {{x=, z=, data={...}}, ...}, ...}，实例很多时占存档的大部分
+EntityRecord 为 SaveData.iter_ents 逐个产出的实例，EntityTable 为按列存放、按 prefab 索引的所有实例
+"""
+
+from array import array
+from math import nan
+from sys import intern
+from typing import Any, Iterable, Iterator, NamedTuple, Optional
+
+
+class EntityRecord(NamedTuple):
+    prefab: str
+    x: float
+    z: float
+
+    # 实例的 data，通过 data[key] 得到转换后的值，data.table(key) 得到子 table 的惰性视图
+    # 存档中没有 data 时为 None，ents 已经转换过时为 dict
+    data: Optional[Any] = None
+
+
+class EntityRow:
+    """EntityTable 中的一行，只在访问时创建"""
+
+    __slots__ = ('prefab', 'x', 'z', 'data')
+
+    def __init__(self, prefab: str, x: float, z: float, data: Optional[Any]):
+        self.prefab = prefab
+        self.x = x
+        self.z = z
+        self.data = data
+
+    def __repr__(self):
+        return f'<EntityRow: {self.prefab} ({self.x}, {self.z})>'
+
+
+class EntityTable:
+    """
+    按列存放的实例，同一种 prefab 的实例是连续的行
+    prefab 名只存一次，每行只记录其编号，坐标存放在 array('d') 中，比嵌套的 dict 小得多
+    按 prefab 查询时通过索引直接得到行的范围
+    """
+
+    def __init__(self):
+        # 编号 -> prefab 名
+        self.prefabs: list[str] = []
+        self._prefab_ids: dict[str, int] = {}
+        # prefab 名 -> 行的范围
+        self._index: dict[str, range] = {}
+
+        self.prefab_ids = array('I')
+        self.x = array('d')
+        self.z = array('d')
+        self.data: list = []
+
+    @classmethod
+    def from_records(cls, records: Iterable[EntityRecord]) -> 'EntityTable':
+        """records 中同一种 prefab 的实例不连续时，会按 prefab 首次出现的顺序重新排列"""
+        table = cls()
+        ids, runs = table._prefab_ids, []
+        for prefab, x, z, data in records:
+            if (prefab_id := ids.get(prefab)) is None:
+                prefab_id = ids[prefab] = len(table.prefabs)
+                table.prefabs.append(intern(prefab))
+            if not runs or runs[-1] != prefab_id:
+                runs.append(prefab_id)
+            table.prefab_ids.append(prefab_id)
+            table.x.append(nan if x is None else x)
+            table.z.append(nan if z is None else z)
+            table.data.append(data)
+
+        if len(runs) != len(table.prefabs):
+            table._regroup()
+        start = 0
+        for prefab, count in zip(table.prefabs, table.counts().values()):
+            table._index[prefab] = range(start, start := start + count)
+        return table
+
+    @classmethod
+    def from_ents(cls, ents: dict) -> 'EntityTable':
+        """从 SaveData.ents 的 {prefab: {1: {x=, z=, data=}, ...}} 创建"""
+        return cls.from_records(EntityRecord(prefab, ent.get('x'), ent.get('z'), ent.get('data'))
+                                for prefab, items in ents.items() for ent in items.values())
+
+    def _regroup(self):
+        order = sorted(range(len(self)), key=self.prefab_ids.__getitem__)
+        self.prefab_ids = array('I', sorted(self.prefab_ids))
+        self.x = array('d', map(self.x.__getitem__, order))
+        self.z = array('d', map(self.z.__getitem__, order))
+        self.data = list(map(self.data.__getitem__, order))
+
+    def __len__(self) -> int:
+        return len(self.prefab_ids)
+
+    def __getitem__(self, row: int) -> EntityRow:
+        return EntityRow(self.prefabs[self.prefab_ids[row]], self.x[row], self.z[row], self.data[row])
+
+    def __iter__(self) -> Iterator[EntityRow]:
+        return map(self.__getitem__, range(len(self)))
+
+    def __contains__(self, prefab: str) -> bool:
+        return prefab in self._index
+
+    def __repr__(self):
+        return f'<EntityTable: {len(self)} ents, {len(self.prefabs)} prefabs>'
+
+    def rows(self, prefab: str) -> range:
+        """prefab 的实例所在的行，不存在时为空"""
+        return self._index.get(prefab, range(0))
+
+    def count(self, prefab: str) -> int:
+        return len(self.rows(prefab))
+
+    def counts(self) -> dict[str, int]:
+        """各 prefab 的实例数量，按 prefab 编号的顺序"""
+        if self._index:
+            return {prefab: len(rows) for prefab, rows in self._index.items()}
+        result = dict.fromkeys(self.prefabs, 0)
+        for prefab_id in self.prefab_ids:
+            result[self.prefabs[prefab_id]] += 1
+        return result
+
+    def positions(self, prefab: str) -> tuple[array, array]:
+        """prefab 的所有实例的 x、z 坐标"""
+        rows = self.rows(prefab)
+        return self.x[rows.start:rows.stop], self.z[rows.start:rows.stop]
+
+    def select(self, prefab: str) -> list[EntityRow]:
+        return [self[i] for i in self.rows(prefab)]
@@ -8,3 +8,4 @@ from .tiles_like_parser import (
     convert_nav
 )
 from .map import Map, OldMap
+from .tile_grid import TileGrid
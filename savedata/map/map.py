@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 
+from typing import Optional, Sequence
+
 from typing_extensions import Annotated
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, model_validator
 from pydantic.functional_validators import BeforeValidator
 from .tiles_like_parser import (
     convert_tiles,
@@ -9,18 +11,22 @@ from .tiles_like_parser import (
     convert_nodeidtilemap,
     convert_tiledata,
     convert_oldtiledata,
-    convert_nav
+    convert_nav,
+    split_planes
 )
+from .tile_grid import TileGrid, arg_spans
 from .topology import Topology
 from .persistdata import Persistdata
+from ..utils.tileindex2position import CoordContext
 
 
 class Map(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
 
     # necessery
 
     # 由 tileid 组成的二维图
-    tiles: Annotated[list[int], BeforeValidator(convert_tiles)]
+    tiles: Annotated[TileGrid, BeforeValidator(convert_tiles)]
 
     # 世界类型名，如 forest, cave
     prefab: str
@@ -34,13 +40,13 @@ class Map(BaseModel):
     # not necessery
 
     # 由 nodeid 组成的二维图
-    nodeidtilemap: Annotated[list[int], BeforeValidator(convert_nodeidtilemap)] = None
+    nodeidtilemap: Annotated[TileGrid, BeforeValidator(convert_nodeidtilemap)] = None
 
     # 由 不知道什么东西 组成的二维图
-    tiledata: Annotated[list[int], BeforeValidator(convert_tiledata)] = None
+    tiledata: Annotated[TileGrid, BeforeValidator(convert_tiledata)] = None
 
     # 由 不知道什么东西 组成的二维图
-    nav: Annotated[list[int], BeforeValidator(convert_nav)] = None
+    nav: Annotated[TileGrid, BeforeValidator(convert_nav)] = None
 
     # 是否隐藏已探索区域。为真时，玩家地图将仅显示当前视野范围，探索过的区域在离开视野后就会变黑。但是数据没有清除，在设否后探索过的区域会重新点亮
     hideminimap: bool = None
@@ -63,8 +69,91 @@ class Map(BaseModel):
     # 拓扑信息，各个 node 的位置、连接信息
     topology: Topology = None
 
+    # noinspection PyNestedDecorators
+    @model_validator(mode='before')
+    @classmethod
+    def _persistdata(cls, data):
+        # persistdata 中的地皮索引按这个地图自己的宽度转为坐标
+        if isinstance(data, dict) and isinstance(data.get('persistdata'), dict):
+            context = CoordContext(data.get('width')).context()
+            data = {**data, 'persistdata': Persistdata.model_validate(data['persistdata'], context=context)}
+        return data
+
+    @model_validator(mode='after')
+    def _reshape(self):
+        # 解码时还不知道地图大小，所有二维图验证后再按 width、height 设置
+        for name in ('tiles', 'nodeidtilemap', 'tiledata', 'nav'):
+            grid = getattr(self, name)
+            if grid is not None and len(grid) == self.width * self.height:
+                setattr(self, name, grid.reshape(self.width, self.height))
+        return self
+
+    # 编辑地皮，修改的地皮的 tiledata 设为 tiledata，为 None 时不修改
+    # 修改的地皮原本如果是码头、耕地等，persistdata.undertile 中记录的原本的地皮也会被删除
+    # 坐标均为地皮坐标 (x, y)，返回修改的范围 spans
+
+    def _edited(self, spans: arg_spans, tiledata: Optional[int]) -> arg_spans:
+        if tiledata is not None and self.tiledata is not None:
+            self.tiledata.fill_spans(spans, tiledata)
+        undertile = self.persistdata.undertile if self.persistdata is not None else None
+        if undertile is not None and undertile.underneath_tiles:
+            rows = {}
+            for y, x0, x1 in spans:
+                rows.setdefault(y, []).append((x0, x1))
+            for x, y in [i for i in undertile.underneath_tiles if i[1] in rows]:
+                if any(x0 <= x < x1 for x0, x1 in rows[y]):
+                    del undertile.underneath_tiles[x, y]
+        return spans
+
+    def fill_spans(self, spans: arg_spans, code: int, tiledata: Optional[int] = 0) -> arg_spans:
+        self.tiles.fill_spans(spans, code)
+        return self._edited(spans, tiledata)
+
+    def fill_rect(self, x0: int, y0: int, x1: int, y1: int, code: int, tiledata: Optional[int] = 0) -> arg_spans:
+        """[x0, x1) x [y0, y1) 的矩形"""
+        return self.fill_spans(self.tiles.rect_spans(x0, y0, x1, y1), code, tiledata)
+
+    def fill_polygon(self, points: Sequence[tuple[float, float]], code: int, tiledata: Optional[int] = 0) -> arg_spans:
+        """中心点在多边形内的地皮"""
+        return self.fill_spans(self.tiles.polygon_spans(points), code, tiledata)
+
+    def flood_fill(self, x: int, y: int, code: int, tiledata: Optional[int] = 0) -> arg_spans:
+        """从 (x, y) 开始，上下左右相连的同种地皮"""
+        if self.tiles[x, y] == code:
+            return []
+        return self.fill_spans(self.tiles.flood_spans(x, y), code, tiledata)
+
+    def replace(self, old: int, new: int, mask: Optional[arg_spans] = None, tiledata: Optional[int] = 0) -> arg_spans:
+        """把 mask 范围内的 old 地皮换为 new，mask 可以由 tiles.rect_spans、polygon_spans 等得到，默认为整个地图"""
+        return self.fill_spans(self.tiles.find_spans(old, mask), new, tiledata)
+
+    def copy_region(self, x0: int, y0: int, x1: int, y1: int) -> tuple[TileGrid, Optional[TileGrid]]:
+        """[x0, x1) x [y0, y1) 中的 tiles 与 tiledata，可以粘贴到其它地图中"""
+        tiledata = self.tiledata.crop(x0, y0, x1, y1) if self.tiledata is not None else None
+        return self.tiles.crop(x0, y0, x1, y1), tiledata
+
+    def paste_region(self, tiles: TileGrid, x: int, y: int, tiledata: Optional[TileGrid] = None) -> arg_spans:
+        """把 copy_region 得到的数据粘贴到左上角为 (x, y) 的位置，没有 tiledata 时设为 0"""
+        spans = self.tiles.paste(tiles, x, y)
+        if tiledata is not None and self.tiledata is not None:
+            self.tiledata.paste(tiledata, x, y)
+            return self._edited(spans, None)
+        return self._edited(spans, 0)
 
-class OldMap(Map):
-    tiles: Annotated[list[int], BeforeValidator(convert_oldtiles)]
 
-    tiledata: Annotated[list[int], BeforeValidator(convert_oldtiledata)] = None
+class OldMap(Map):
+    tiles: Annotated[TileGrid, BeforeValidator(convert_oldtiles)]
+
+    # 旧存档中没有单独的 tiledata，是 tiles 中每块地皮的高字节，与 tiles 共用一次解码、拆分的结果
+    tiledata: Annotated[TileGrid, BeforeValidator(convert_oldtiledata)] = None
+
+    # noinspection PyNestedDecorators
+    @model_validator(mode='before')
+    @classmethod
+    def _split_tiles(cls, data):
+        if isinstance(data, dict) and isinstance(data.get('tiles'), str):
+            planes = split_planes(data['tiles'])
+            data = {**data, 'tiles': planes}
+            if data.get('tiledata') is None:
+                data['tiledata'] = planes
+        return data
@@ -1,15 +1,16 @@
 # -*- coding: utf-8 -*-
 from typing import Union
 
-from pydantic import BaseModel, BeforeValidator, model_validator
+from pydantic import BaseModel, BeforeValidator, ValidationInfo, model_validator
 from typing_extensions import Annotated
 
 from ...utils.decode_run import decode
-from ...utils.tileindex2position import PointPos
+from ...utils.tileindex2position import coord_context
 
 
-def index2pos(data: dict[int, Union[int, bool]]) -> dict[tuple[int, int], Union[int, bool]]:
-    return {PointPos.index2_pos(i): j for i, j in data.items()}
+def index2pos(data: dict[int, Union[int, bool]], info: ValidationInfo) -> dict[tuple[int, int], Union[int, bool]]:
+    coord = coord_context(info)
+    return {coord.index2_pos(i): j for i, j in data.items()}
 
 
 class Dockmanager(BaseModel):
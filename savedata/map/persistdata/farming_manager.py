@@ -1,11 +1,11 @@
 # -*- coding: utf-8 -*-
 from typing import Union
 
-from pydantic import BaseModel, BeforeValidator, model_validator
+from pydantic import BaseModel, BeforeValidator, ValidationInfo, model_validator
 from typing_extensions import Annotated
 
 from ...utils.decode_run import decode
-from ...utils.tileindex2position import PointPos
+from ...utils.tileindex2position import coord_context
 
 
 class _WeedSpawn(BaseModel):
@@ -21,12 +21,14 @@ def _decode_nutrient(n: int):
     return (n >> 16) & 0xff, (n >> 8) & 0xff, n & 0xff
 
 
-def _recover_nutrient(d: dict[int, int]) -> dict[int, tuple[int, int, int]]:
-    return {PointPos.index2_pos(i): _decode_nutrient(j) for i, j in d.items()}
+def _recover_nutrient(d: dict[int, int], info: ValidationInfo) -> dict[tuple[int, int], tuple[int, int, int]]:
+    coord = coord_context(info)
+    return {coord.index2_pos(i): _decode_nutrient(j) for i, j in d.items()}
 
 
-def index2pos(data: dict[int, Union[int, bool]]) -> dict[tuple[int, int], Union[int, bool]]:
-    return {PointPos.index2_pos(i): j for i, j in data.items()}
+def index2pos(data: dict[int, Union[int, bool]], info: ValidationInfo) -> dict[tuple[int, int], Union[int, bool]]:
+    coord = coord_context(info)
+    return {coord.index2_pos(i): j for i, j in data.items()}
 
 
 class FarmingManager(BaseModel):
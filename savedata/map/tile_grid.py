@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+
+"""
+地皮等按地皮排列的二维数据
+数据按行连续存放在 array 中，每块地皮只占 1 或 2 字节，不会为每块地皮创建 int 对象
+索引与 PointPos 一致，地皮 (x, y) 在数据中的位置是 x + y * width
+
+编辑时修改的范围表示为 spans，即 (y, x0, x1) 的列表，每项为第 y 行中 [x0, x1) 的地皮
+每一段都通过 array 的切片赋值一次完成，查找连续的段通过 bytes 的 find、正则完成，不会逐块地皮循环
+"""
+
+from array import array
+from math import ceil, floor
+from re import compile
+from sys import byteorder
+from typing import Iterator, Optional, Sequence, Union
+
+# (y, x0, x1)
+arg_spans = list[tuple[int, int, int]]
+
+_ONES = compile(rb'\x01+')
+
+
+class TileGrid(Sequence):
+    """
+    grid[i] 按一维索引，与原本的 list[int] 一致，grid[x, y] 按二维索引
+    row、col 得到一行、一列，to_numpy 得到共享内存的 numpy 数组
+    """
+
+    def __init__(self, data: array, width: int = None, height: int = None):
+        self.data = data
+        self.width = len(data) if width is None else width
+        self.height = (len(data) // self.width if self.width else 0) if height is None else height
+        if self.width * self.height != len(data):
+            raise ValueError(f'数据长度 {len(data)} 与大小 {self.width}x{self.height} 不一致')
+
+    def reshape(self, width: int, height: int = None) -> 'TileGrid':
+        """按地图大小设置宽高，共享同一份数据"""
+        return TileGrid(self.data, width, height)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.data)
+
+    def _index(self, index: Union[int, slice, tuple[int, int]]) -> Union[int, slice]:
+        if not isinstance(index, tuple):
+            return index
+        x, y = index
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError(f'({x}, {y}) 超出范围 {self.width}x{self.height}')
+        return x + y * self.width
+
+    def __getitem__(self, index: Union[int, slice, tuple[int, int]]):
+        return self.data[self._index(index)]
+
+    def __setitem__(self, index: Union[int, slice, tuple[int, int]], value):
+        self.data[self._index(index)] = value
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, TileGrid):
+            return (self.width, self.height) == (other.width, other.height) and self.data == other.data
+        if isinstance(other, Sequence):
+            return self.data.tolist() == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f'<TileGrid: {self.width}x{self.height} {self.data.typecode}>'
+
+    def row(self, y: int) -> memoryview:
+        """第 y 行，不复制数据"""
+        return memoryview(self.data)[y * self.width:(y + 1) * self.width]
+
+    def col(self, x: int) -> array:
+        """第 x 列"""
+        return self.data[x::self.width]
+
+    def _fill_row(self, value: int) -> array:
+        try:
+            return array(self.data.typecode, [value]) * self.width
+        except OverflowError:
+            raise ValueError(f'{value} 超出 {self.data.typecode} 的范围') from None
+
+    def fill_spans(self, spans: arg_spans, value: int):
+        row, data, width = self._fill_row(value), self.data, self.width
+        for y, x0, x1 in spans:
+            data[y * width + x0:y * width + x1] = row[:x1 - x0]
+
+    def rect_spans(self, x0: int, y0: int, x1: int, y1: int) -> arg_spans:
+        """[x0, x1) x [y0, y1) 的矩形，超出范围的部分会被忽略"""
+        x0, x1 = max(x0, 0), min(x1, self.width)
+        if x0 >= x1:
+            return []
+        return [(y, x0, x1) for y in range(max(y0, 0), min(y1, self.height))]
+
+    def polygon_spans(self, points: Sequence[tuple[float, float]]) -> arg_spans:
+        """中心点在多边形内的地皮，按奇偶规则判断，points 为地皮坐标，可以是小数"""
+        edges = list(zip(points, points[1:] + points[:1]))
+        spans = []
+        top = max(floor(min(y for _, y in points)), 0)
+        bottom = min(ceil(max(y for _, y in points)), self.height)
+        for y in range(top, bottom):
+            center = y + 0.5
+            xs = sorted(xa + (center - ya) * (xb - xa) / (yb - ya)
+                        for (xa, ya), (xb, yb) in edges if (ya <= center) != (yb <= center))
+            for a, b in zip(xs[0::2], xs[1::2]):
+                # 中心 x + 0.5 在 [a, b) 中
+                x0, x1 = max(ceil(a - 0.5), 0), min(ceil(b - 0.5), self.width)
+                if x0 < x1:
+                    spans.append((y, x0, x1))
+        return spans
+
+    def mask(self, value: int) -> bytearray:
+        """每块地皮一个字节，值为 value 的地皮为 1，其它为 0"""
+        data = self.data
+        if byteorder == 'big' and data.itemsize > 1:
+            data = array(data.typecode, data)
+            data.byteswap()
+        raw = data.tobytes()
+        size = data.itemsize
+        result = None
+        for i in range(size):
+            table = bytearray(256)
+            table[(value >> (8 * i)) & 0xff] = 1
+            plane = int.from_bytes(raw[i::size].translate(table), 'little')
+            result = plane if result is None else result & plane
+        return bytearray(result.to_bytes(len(data), 'little'))
+
+    def find_spans(self, value: int, within: Optional[arg_spans] = None) -> arg_spans:
+        """值为 value 的地皮，within 为查找的范围，默认为整个地图"""
+        mask, width = self.mask(value), self.width
+        if within is None:
+            within = [(y, 0, width) for y in range(self.height)]
+        return [(y, match.start() - y * width, match.end() - y * width)
+                for y, x0, x1 in within for match in _ONES.finditer(mask, y * width + x0, y * width + x1)]
+
+    def flood_spans(self, x: int, y: int) -> arg_spans:
+        """从 (x, y) 开始，上下左右相连、值与 (x, y) 相同的地皮"""
+        mask, width = self.mask(self[x, y]), self.width
+        spans, stack = [], [(x, y)]
+        while stack:
+            x, y = stack.pop()
+            start, index = y * width, y * width + x
+            if not mask[index]:
+                continue
+            left = mask.rfind(0, start, index) + 1 or start
+            right = mask.find(0, index, start + width)
+            right = start + width if right < 0 else right
+            # 标记为已填充
+            mask[left:right] = bytes(right - left)
+            spans.append((y, left - start, right - start))
+            for row in (y - 1, y + 1):
+                if 0 <= row < self.height:
+                    base = row * width
+                    stack.extend((match.start() - base, row) for match in
+                                 _ONES.finditer(mask, base + left - start, base + right - start))
+        return spans
+
+    def crop(self, x0: int, y0: int, x1: int, y1: int) -> 'TileGrid':
+        """[x0, x1) x [y0, y1) 的部分，复制为新的 TileGrid"""
+        spans = self.rect_spans(x0, y0, x1, y1)
+        data = array(self.data.typecode)
+        for y, a, b in spans:
+            data.extend(self.data[y * self.width + a:y * self.width + b])
+        width = spans[0][2] - spans[0][1] if spans else 0
+        return TileGrid(data, width, len(spans))
+
+    def paste(self, grid: 'TileGrid', x: int, y: int) -> arg_spans:
+        """把 grid 复制到左上角为 (x, y) 的位置，超出范围的部分会被忽略，返回修改的范围"""
+        source = grid.data
+        if source.typecode != self.data.typecode:
+            try:
+                source = array(self.data.typecode, source)
+            except OverflowError:
+                raise ValueError(f'粘贴的数据超出 {self.data.typecode} 的范围') from None
+        spans = self.rect_spans(x, y, x + grid.width, y + grid.height)
+        for row, x0, x1 in spans:
+            start = (row - y) * grid.width + x0 - x
+            self.data[row * self.width + x0:row * self.width + x1] = source[start:start + x1 - x0]
+        return spans
+
+    def tolist(self) -> list[int]:
+        return self.data.tolist()
+
+    def to_numpy(self):
+        """形状为 (height, width) 的 numpy 数组，与 TileGrid 共享内存，需要安装 numpy"""
+        import numpy
+        return numpy.frombuffer(self.data, dtype=self.data.typecode).reshape(self.height, self.width)
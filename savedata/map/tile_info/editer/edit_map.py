@@ -1,15 +1,9 @@
 # -*- coding: utf-8 -*-
 from collections import namedtuple
-from itertools import product, chain
 from savedata import SaveData
 
 
 savedata = SaveData('../../../src/saved_data/0000020657')
-map_data = savedata.map.tiles
-width = savedata.map.width
-height = savedata.map.height
-
-tile = tuple(map_data[i * height: (i + 1) * height] for i in range(width))
 
 # 要铺的地皮类型
 tile_codes = [*range(35, 42), 78]
@@ -33,22 +27,10 @@ for i, code in enumerate(tile_codes):
     rr = range(start_point.y + col * size, start_point.y + (col + 1) * size)
     # 列的范围
     cr = range(start_point.x + row * size, start_point.x + (row + 1) * size)
-    for r, c in product(rr, cr):
-        tile[r][c] = code
-
-from struct import pack
-tile = b''.join([pack('<H', i) for i in chain.from_iterable(tile)])
-
-from base64 import b64encode
-tile = b64encode(b'VRSN\x00\x01\x00\x00\x00' + tile)
-tile = tile.decode('ascii')
+    # 整块矩形一次填充，tiledata 与 undertile 也会一起更新
+    savedata.map.fill_rect(cr.start, rr.start, cr.stop, rr.stop, code)
 
 
 def save():
-    with open(savedata._file.name, 'w+', encoding='utf-8') as savad:
-        data = savad.read()
-        tile_encode = savedata.all_data['map']['tiles']
-        data = data.replace(tile_encode, tile)
-        savad.seek(0)
-        savad.write(data)
-
+    # 只覆盖文件中修改过的 tiles、tiledata 等部分
+    savedata.write()
@@ -10,54 +10,168 @@ klei 在 2022.06 修改了地皮的数量，本来是一字节 256，修改为
 oldtiles(01 1a 01 11 01 18 01 1c) -> newtiles(01 00 01 00 01 00 01 00) + tiledata(ff 8a ff 81 ff 88 ff 8c)
 """
 
-from base64 import b64decode
-from itertools import chain
-from struct import iter_unpack
+from array import array
+from base64 import b64decode, b64encode
 from functools import wraps
+from sys import byteorder
+from typing import Optional, Union
+
+from .tile_grid import TileGrid
+
+# 字节 b 对应的 b - 0x70，按有符号字节存放
+_MINUS_0X70 = bytes((i - 0x70) & 0xff for i in range(256))
+
+# 编码后的字符串，或 split_planes 拆分后的 (低字节, 高字节)
+arg_planes = Union[str, tuple[bytes, bytes]]
+
+
+def _decode(data: str) -> bytes:
+    if not data.startswith('VlJTTgABAAAA'):
+        raise TypeError('传入数据不是编码后的饥荒地图数据')
+
+    data_decoded = b64decode(data)
+    magic, data_real = data_decoded[:9], data_decoded[9:]
+    if len(data_real) % 2:
+        raise ValueError('地图数据的长度应为 2 的倍数')
+    return data_real
+
+
+def split_planes(data: str) -> tuple[bytes, bytes]:
+    """每块地皮占两个字节的数据，解码后按字节拆分为 (低字节, 高字节) 两层"""
+    data_real = _decode(data)
+    return data_real[0::2], data_real[1::2]
 
 
 def _convert_base(fn):
     @wraps(fn)
-    def wrap(data: str) -> list[int]:
-        if not data.startswith('VlJTTgABAAAA'):
-            raise TypeError('传入数据不是编码后的饥荒地图数据')
+    def wrap(data: str) -> TileGrid:
+        # 此时还不知道地图大小，由 Map 验证后设置
+        return TileGrid(fn(_decode(data)))
+
+    return wrap
 
-        data_decoded = b64decode(data)
-        magic, data_real = data_decoded[:9], data_decoded[9:]
 
-        return fn(data_real)
+def _convert_plane(fn):
+    @wraps(fn)
+    def wrap(data: arg_planes) -> TileGrid:
+        # 已经拆分过的数据直接使用，OldMap 的 tiles 与 tiledata 共用一次解码、拆分的结果
+        return TileGrid(fn(split_planes(data) if isinstance(data, str) else data))
 
     return wrap
 
 
-@_convert_base
-def convert_tiles(data: str) -> list[int]:
-    return list(chain.from_iterable(iter_unpack('<H', data)))
+def _uint16(data: bytes) -> array:
+    result = array('H', data)
+    if byteorder == 'big':
+        result.byteswap()
+    return result
 
 
 @_convert_base
-def convert_oldtiles(data: str) -> list[int]:
-    return [i[0] for i in iter_unpack('<2B', data)]
+def convert_tiles(data: bytes) -> array:
+    return _uint16(data)
+
+
+@_convert_plane
+def convert_oldtiles(planes: tuple[bytes, bytes]) -> array:
+    return array('B', planes[0])
 
 
 @_convert_base
-def convert_nodeidtilemap(data: str) -> list[int]:
-    return list(chain.from_iterable(iter_unpack('<H', data)))
+def convert_nodeidtilemap(data: bytes) -> array:
+    return _uint16(data)
 
 
 # 下面还不知道怎么处理，不太懂，下面的处理方式暂时只是猜测，虽然感觉差不太多
 
 
-@_convert_base
-def convert_tiledata(data: str) -> list[int]:
-    return [i[1] - 0x70 for i in iter_unpack('<2B', data)]
+@_convert_plane
+def convert_tiledata(planes: tuple[bytes, bytes]) -> array:
+    high = planes[1]
+    if max(high, default=0) < 0x70 + 0x80:
+        return array('b', high.translate(_MINUS_0X70))
+    return array('h', [i - 0x70 for i in high])
 
 
-@_convert_base
-def convert_oldtiledata(data: str) -> list[int]:
-    return [i[1] for i in iter_unpack('<2B', data)]
+@_convert_plane
+def convert_oldtiledata(planes: tuple[bytes, bytes]) -> array:
+    return array('B', planes[1])
 
 
-@_convert_base
-def convert_nav(data: str) -> list[int]:
-    return [i[1] for i in iter_unpack('<2B', data)]
+@_convert_plane
+def convert_nav(planes: tuple[bytes, bytes]) -> array:
+    return array('B', planes[1])
+
+
+# 编码，convert_* 的逆操作，结果与游戏中 TheWorld.Map:GetStringEncode 的格式一致
+
+_MAGIC = b'VRSN\x00\x01\x00\x00\x00'
+_PLUS_0X70 = bytes((i + 0x70) & 0xff for i in range(256))
+
+
+def _encode(data: bytes) -> str:
+    return b64encode(_MAGIC + data).decode('ascii')
+
+
+def _as_array(grid, typecode: str) -> array:
+    data = grid.data if isinstance(grid, TileGrid) else grid
+    if isinstance(data, array) and data.typecode == typecode:
+        return data
+    try:
+        return array(typecode, data)
+    except OverflowError:
+        raise ValueError(f'数据超出 {typecode} 的范围') from None
+
+
+def _join_planes(low: bytes, high: bytes) -> str:
+    if len(low) != len(high):
+        raise ValueError(f'两层数据的长度不一致 {len(low)} {len(high)}')
+    data = bytearray(len(low) * 2)
+    data[0::2], data[1::2] = low, high
+    return _encode(bytes(data))
+
+
+def _other_plane(original: Optional[str], index: int, length: int) -> bytes:
+    """原始数据中另一层的字节，没有原始数据时为 0"""
+    if original is None:
+        return bytes(length)
+    return split_planes(original)[index]
+
+
+def _uint16_bytes(grid) -> bytes:
+    data = _as_array(grid, 'H')
+    if byteorder == 'big':
+        data = array('H', data)
+        data.byteswap()
+    return data.tobytes()
+
+
+def encode_tiles(grid) -> str:
+    return _encode(_uint16_bytes(grid))
+
+
+def encode_nodeidtilemap(grid) -> str:
+    return _encode(_uint16_bytes(grid))
+
+
+def encode_oldtiles(grid, tiledata=None, original: str = None) -> str:
+    """tiledata 为 OldMap.tiledata，没有时使用 original 中的高字节"""
+    low = _as_array(grid, 'B').tobytes()
+    high = _as_array(tiledata, 'B').tobytes() if tiledata is not None else _other_plane(original, 1, len(low))
+    return _join_planes(low, high)
+
+
+def encode_tiledata(grid, original: str = None) -> str:
+    """解码时只保留了高字节，低字节从 original 中取得，没有时为 0"""
+    data = grid.data if isinstance(grid, TileGrid) else grid
+    if isinstance(data, array) and data.typecode == 'b':
+        high = data.tobytes().translate(_PLUS_0X70)
+    else:
+        high = _as_array([i + 0x70 for i in data], 'B').tobytes()
+    return _join_planes(_other_plane(original, 0, len(high)), high)
+
+
+def encode_nav(grid, original: str = None) -> str:
+    """解码时只保留了高字节，低字节从 original 中取得，没有时为 0"""
+    high = _as_array(grid, 'B').tobytes()
+    return _join_planes(_other_plane(original, 0, len(high)), high)
@@ -9,19 +9,42 @@ TheSim:ZipAndEncodeString('str') -> strwd
 
 """
 
+from functools import cached_property
 from json import dumps
 from pathlib import Path
-from typing import Union
+from shutil import copyfile
+from typing import Any, Callable, Iterable, Iterator, Optional, Union
 
-import lupa.lua51 as lupa
+from klei_zip import encode as zip_encode
 
+from .entity import EntityRecord, EntityTable
 from .map import Map, OldMap
-from .utils.table2dict import Converter
-from .utils.tileindex2position import PointPos
+from .map.tiles_like_parser import encode_nav, encode_nodeidtilemap, encode_oldtiles, encode_tiledata, encode_tiles
+from .map.persistdata import Persistdata
+from .spatial import SpatialIndex
+from .utils.decode_run import decode
+from .utils.lua_parser import LuaTable, load
+from .utils.table2dict import LupaTable, lupa
+from .utils.tileindex2position import CoordContext
+
+# 存档中各项数据的名称，及其是否一定存在
+SECTIONS = {
+    "map": True,
+    "meta": True,
+    "world_network": True,
+    "mods": True,
+    "ents": True,
+    "snapshot": False,
+    "super": False,
+}
 
 
 class SaveData:
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, sections: Optional[Iterable[str]] = None):
+        """
+        sections 为需要读取的数据，可选 SECTIONS 中的各项及 extra_data，默认为全部
+        各项数据在第一次访问时才会转换、验证，访问未选择的数据会报错
+        """
         file = Path(file_path)
         if not file.is_file():
             if file.exists():
@@ -30,6 +53,10 @@ class SaveData:
 
         self._file = file
 
+        self._sections = None if sections is None else frozenset(sections)
+        if self._sections is not None and (unknown := self._sections - SECTIONS.keys() - {'extra_data'}):
+            raise ValueError(f'未知的数据项 {sorted(unknown)}，应为 {list(SECTIONS) + ["extra_data"]} 之一')
+
         # map meta world_network mods ents  snapshot super    playerinfo
         # 正常存档中会有 (map 地图数据, meta 存档基础数据, world_network 世界数据, mods 模组数据, ents 实例数据)
         # 存档时如果游戏还在运行且有玩家，会有 snapshot，记录当前玩家信息
@@ -43,34 +70,47 @@ class SaveData:
 
         # 没有找到 playerinfo 相关的信息，但是有个存档中确实有，不知道会不会是 mod 导致的，应该不需要考虑
 
-        # 所有数据
-        self.all_data = self._load()
+        # lupa 运行得到的 table，或 lua_parser 得到的惰性 table（见 _load），各项数据在访问时才转换为 dict
+        self._table: Union[LuaTable, LupaTable, None] = self._load()
+        self._keys: list = list(self._table) if self._table is not None else []
+
+        # 已转换为 dict 的数据
+        self._converted: dict[str, Any] = {}
 
-        # 正常存档一定会有的数据
-        self.map: Union[Map, OldMap]
-        self.meta: dict = {}
-        self.world_network: dict = {}
-        self.mods: dict = {}
-        self.ents: dict = {}
+        # 在 map 之前单独读取的 map.persistdata，(原本的数据, 验证后的数据)，map 转换时会沿用，不会有两份
+        self._persistdata: Optional[tuple[Optional[dict], Optional[Persistdata]]] = None
 
-        # 不一定会有的数据
-        self.snapshot: dict = {}
-        self.super: bool = False
+        for key, necessary in SECTIONS.items():
+            if necessary and key not in self._keys:
+                raise ValueError(f'缺少 {key} 数据')
 
-        # 除了以上之外的数据
-        self.extra_data: dict = {}
+    def _selected(self, key: str) -> bool:
+        if key not in SECTIONS:
+            key = 'extra_data'
+        return self._sections is None or key in self._sections
 
-        self._format_data()
+    def _section(self, key: str, default: Any = None) -> Any:
+        """转换单项数据，结果会被缓存"""
+        if not self._selected(key):
+            raise ValueError(f'未读取 {key} 数据，需要在 sections 中指定')
+        if key not in self._keys:
+            return default
+        if key not in self._converted:
+            self._converted[key] = self._convert(lambda table: table[key])
+        return self._converted[key]
 
-    def _verification(self):
-        """
-        验证并处理数据
-        """
-        # 在实例化 map 对象之前，为其中某些数据建立坐标与索引的转换关系
-        PointPos.init(self.map.get('width'))
-        self._map_process()
+    def _convert(self, fn: Callable[[Any], Any]) -> Any:
+        """通过 fn 从 table 中取值，lua_parser 无法解析时改用 lupa 重新运行整个存档"""
+        try:
+            return fn(self._table)
+        except ValueError:
+            if lupa is None or isinstance(self._table, LupaTable):
+                raise
+        self._table = LupaTable.execute(self._read())
+        return fn(self._table)
 
-    def _map_process(self):
+    @cached_property
+    def map(self) -> Union[Map, OldMap]:
         """
         if not savedata.map.tiledata then
             map:SetFromStringLegacy(savedata.map.tiles)
@@ -79,46 +119,222 @@ class SaveData:
             map:SetMapDataFromString(savedata.map.tiledata)
         end
         """
-        self.map: dict
-        if 'tiledata' in self.map:
-            self.map = Map(**self.map)
-        else:
-            self.map = OldMap(**self.map)
-
-    def _format_data(self):
-        data_list = list(self.all_data)
-        contrast_necessary = {
-            "map": True,
-            "meta": True,
-            "world_network": True,
-            "mods": True,
-            "ents": True,
-            "snapshot": False,
-            "super": False,
-        }
-        for key, necessary in contrast_necessary.items():
-            if key in data_list:
-                self.__setattr__(key, self.all_data[key])
-                data_list.remove(key)
+        data = self._section('map')
+        if self._persistdata is not None and self._persistdata[0] is not None:
+            # 已经单独读取过 persistdata 时沿用，之前对它的修改不会丢失
+            data['persistdata'] = self._persistdata[0]
+            data = {**data, 'persistdata': self._persistdata[1]}
+        if 'tiledata' in data:
+            return Map(**data)
+        return OldMap(**data)
+
+    def _map_items(self, *keys: str) -> tuple:
+        """只取 map 中的几项，不转换 tiles 等其它数据"""
+        if not self._selected('map'):
+            raise ValueError('未读取 map 数据，需要在 sections 中指定')
+        if 'map' in self._converted:
+            return tuple(self._converted['map'].get(key) for key in keys)
+
+        def read(table):
+            map_table = table.table('map')
+            return tuple(map_table[key] for key in keys)
+
+        return self._convert(read)
+
+    @property
+    def persistdata(self) -> Optional[Persistdata]:
+        """只验证 map.persistdata，不处理 tiles 等地图数据，map 转换后即 map.persistdata"""
+        if 'map' in self.__dict__:
+            return self.map.persistdata
+        if self._persistdata is None:
+            width, persistdata = self._map_items('width', 'persistdata')
+            validated = None
+            if persistdata is not None:
+                validated = Persistdata.model_validate(persistdata, context=CoordContext(width).context())
+            self._persistdata = persistdata, validated
+        return self._persistdata[1]
+
+    @cached_property
+    def meta(self) -> dict:
+        return self._section('meta')
+
+    @cached_property
+    def world_network(self) -> dict:
+        return self._section('world_network')
+
+    @cached_property
+    def mods(self) -> dict:
+        return self._section('mods')
+
+    @cached_property
+    def ents(self) -> dict:
+        return self._section('ents')
+
+    def iter_ents(self, prefabs: Optional[Iterable[str]] = None) -> Iterator[EntityRecord]:
+        """
+        逐个产出实例，不会转换整个 ents，prefabs 为需要的 prefab 名，默认为全部
+        使用 lua_parser 时每种 prefab 只记录各实例在存档中的位置，实例的 data 在访问时才解析
+        """
+        if not self._selected('ents'):
+            raise ValueError('未读取 ents 数据，需要在 sections 中指定')
+        prefabs = None if prefabs is None else frozenset(prefabs)
+
+        if 'ents' in self._converted:
+            for prefab, items in self._converted['ents'].items():
+                if prefabs is None or prefab in prefabs:
+                    for ent in items.values():
+                        yield EntityRecord(prefab, ent.get('x'), ent.get('z'), ent.get('data'))
+            return
+
+        ents = self._convert(lambda table: table.table('ents'))
+        for prefab in list(ents):
+            if prefabs is not None and prefab not in prefabs:
                 continue
-            if necessary:
-                raise ValueError(f'缺少 {key} 数据')
+            items = ents.table(prefab)
+            for index in items:
+                ent = items.table(index)
+                yield EntityRecord(prefab, ent['x'], ent['z'], ent.table('data'))
+
+    @cached_property
+    def entity_table(self) -> EntityTable:
+        """按列存放的所有实例，通过 iter_ents 创建，不会转换整个 ents"""
+        return EntityTable.from_records(self.iter_ents())
 
-        for k in data_list:
-            self.extra_data[k] = self.all_data[k]
+    @cached_property
+    def spatial_index(self) -> SpatialIndex:
+        """entity_table 中实例坐标的空间索引，行号即 entity_table 的行号"""
+        width, height = self._map_items('width', 'height')
+        return SpatialIndex.from_entities(self.entity_table, width, height)
 
-        self._verification()
+    @cached_property
+    def snapshot(self) -> dict:
+        return self._section('snapshot', {})
 
-    def _load(self):
-        with self._file.open('r', encoding='utf-8') as file:
-            savedata = file.read().removesuffix('\x00')
+    @cached_property
+    def super(self) -> bool:
+        return self._section('super', False)
 
+    @cached_property
+    def extra_data(self) -> dict:
+        """除了 SECTIONS 之外的数据"""
+        return {k: self._section(k) for k in self._keys if k not in SECTIONS}
+
+    @property
+    def all_data(self) -> dict:
+        """所有已选择的数据，未经验证"""
+        return {k: self._section(k) for k in self._keys if self._selected(k)}
+
+    def _read(self) -> str:
+        # 不转换换行符，字符位置才能与文件中的字节位置对应，见 _blob_offset
+        with self._file.open('r', encoding='utf-8', newline='') as file:
+            return file.read().removesuffix('\x00')
+
+    def _load(self) -> Union[LuaTable, LupaTable, None]:
+        savedata = self._read()
         if not savedata:
-            return {}
+            return None
+
+        # lua_parser 按需扫描，只读取少数几项时可以跳过大部分内容，但完整转换比 lupa 慢
+        # 安装了 lupa 时，只有不读取 ents（存档中最大的部分）时才使用 lua_parser
+        if lupa is None or (self._sections is not None and 'ents' not in self._sections):
+            try:
+                return load(savedata)
+            except ValueError:
+                if lupa is None:
+                    raise
+        return LupaTable.execute(savedata)
+
+    def _changed_blobs(self) -> dict[tuple[str, ...], tuple[str, str]]:
+        """map 中修改过的地皮等数据，在 map 中的路径 -> (原本的字符串, 重新编码的字符串)"""
+        changed = {}
+        if 'map' in self.__dict__:
+            raw, map_ = self._converted['map'], self.map
+            if isinstance(map_, OldMap):
+                # 旧存档的 tiledata 是 tiles 中的高字节，一起写回 tiles
+                encoded = {('tiles',): encode_oldtiles(map_.tiles, map_.tiledata, raw['tiles'])}
+            else:
+                encoded = {('tiles',): encode_tiles(map_.tiles)}
+                if map_.tiledata is not None:
+                    encoded['tiledata', ] = encode_tiledata(map_.tiledata, raw.get('tiledata'))
+                if map_.nodeidtilemap is not None:
+                    encoded['nodeidtilemap', ] = encode_nodeidtilemap(map_.nodeidtilemap)
+            if map_.nav is not None:
+                encoded['nav', ] = encode_nav(map_.nav, raw.get('nav'))
+            changed = {k: (raw[k[0]], v) for k, v in encoded.items() if raw.get(k[0]) != v}
+            width, persistdata, raw_persistdata = map_.width, map_.persistdata, raw.get('persistdata')
+        elif self._persistdata is not None:
+            # 只单独读取、修改了 persistdata
+            (width, ), (raw_persistdata, persistdata) = self._map_items('width'), self._persistdata
+        else:
+            return changed
+
+        undertile = persistdata.undertile if persistdata is not None else None
+        if undertile is not None:
+            original = raw_persistdata['undertile']['str']
+            coord = CoordContext(width)
+            tiles = {coord.pos2index(k): v for k, v in undertile.underneath_tiles.items()}
+            if decode(original).get('underneath_tiles', {}) != tiles:
+                body = ','.join(f'[{i}]={code}' for i, code in sorted(tiles.items()))
+                changed['persistdata', 'undertile', 'str'] = original, zip_encode(f'return {{underneath_tiles={{{body}}}}}')
+        return changed
+
+    def _blob_offset(self, path: tuple[str, ...], original: str, data: bytes) -> int:
+        """原本的字符串在文件中的字节位置"""
+        table = self._table.table('map') if isinstance(self._table, LuaTable) else None
+        for key in path[:-1]:
+            table = table.table(key) if table is not None else None
+        span = table.span(path[-1]) if table is not None else None
+        if span is not None and table.text[span[0] + 1:span[1] - 1] == original:
+            # 字符串之前可能有非 ascii 字符，字符位置需要转为字节位置
+            return len(table.text[:span[0] + 1].encode('utf-8'))
+        if (offset := data.find(original.encode('ascii'))) < 0:
+            raise ValueError(f'文件中找不到 map.{".".join(path)} 原本的数据，文件可能已被修改')
+        return offset
+
+    def write(self, save_path: str = None):
+        """
+        把 map 中修改过的 tiles、tiledata、nodeidtilemap、nav 及 persistdata.undertile 写回存档，其它数据保持不变
+        没有转换 map 时，也会写回通过 persistdata 做的修改
+        只按字节位置覆盖修改过的项，长度不变时不会重写整个文件
+        save_path 为空时写回原文件，否则先复制原文件再修改
+        """
+        changed = self._changed_blobs()
+        file = self._file if save_path is None else Path(save_path)
+        same = file.resolve() == self._file.resolve()
+        if not same:
+            copyfile(self._file, file)
+        if not changed:
+            return
+
+        data = self._file.read_bytes()
+        patches = sorted((self._blob_offset(k, old, data), old, new) for k, (old, new) in changed.items())
+        # 写入前确认每个位置上确实是原本的数据，否则会覆盖其它内容
+        for offset, old, _ in patches:
+            if data[offset:offset + len(old)] != old.encode('ascii'):
+                raise ValueError(f'文件中 {offset} 处不是原本的数据，文件可能已被修改')
+        if all(len(old) == len(new) for _, old, new in patches):
+            with file.open('r+b') as f:
+                for offset, _, new in patches:
+                    f.seek(offset)
+                    f.write(new.encode('ascii'))
+        else:
+            pieces, last = [], 0
+            for offset, old, new in patches:
+                pieces += data[last:offset], new.encode('ascii')
+                last = offset + len(old)
+            pieces.append(data[last:])
+            file.write_bytes(b''.join(pieces))
 
-        lua = lupa.LuaRuntime()
-        xx = lua.eval('loadstring(python.eval("savedata"))()')
-        return Converter().table_dict(xx)
+        if same:
+            root = self._converted['map'] if 'map' in self.__dict__ else {'persistdata': self._persistdata[0]}
+            for path, (_, new) in changed.items():
+                raw = root
+                for key in path[:-1]:
+                    raw = raw[key]
+                raw[path[-1]] = new
+            if isinstance(self._table, LuaTable):
+                # 文件内容已经改变，重新扫描，之后再写入时的位置与原本的数据才能对应
+                self._table = load(self._read())
 
     def save(self, save_path: str = None):
         if save_path is None:
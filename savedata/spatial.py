@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+"""
+实例坐标的空间索引
+坐标统一转为地皮坐标（见 utils.tileindex2position.world2tile），按 cell x cell 块地皮划分网格
+同一格中的实例的行号连续存放在一个 array 中，查询时只检查相关的格，不需要遍历所有实例
+查询的参数与结果可以是地皮坐标，也可以是世界坐标（world=True），结果为行号，与创建时坐标的顺序一致
+"""
+
+from array import array
+from heapq import nsmallest
+from itertools import accumulate
+from math import floor, inf, isnan
+from typing import Iterable, Sequence
+
+from .utils.tileindex2position import tile2world, world2tile
+
+
+class SpatialIndex:
+
+    def __init__(self, x: Sequence[float], z: Sequence[float], width: int, height: int = None, cell: int = 4):
+        """
+        x、z 为世界坐标，例如 EntityTable.x、EntityTable.z，坐标为 nan 的实例不会被索引
+        width、height 为地图大小，超出地图的实例归入边缘的格中
+        """
+        if cell < 1:
+            raise ValueError(f'网格大小应大于 0，而不是 {cell}')
+        self.width, self.height, self.cell = width, width if height is None else height, cell
+        self._cols = self.width // cell + 1
+        self._rows = self.height // cell + 1
+
+        self.x, self.y = array('d'), array('d')
+        for tile_x, tile_y in (world2tile(i, j, width, height) for i, j in zip(x, z)):
+            self.x.append(tile_x)
+            self.y.append(tile_y)
+
+        # 计数排序，第 i 格中的行号为 _order[_starts[i]:_starts[i + 1]]
+        cells = [-1 if isnan(i) or isnan(j) else self._cell(i, j) for i, j in zip(self.x, self.y)]
+        counts = [0] * (self._cols * self._rows)
+        for i in cells:
+            if i >= 0:
+                counts[i] += 1
+        self._starts = array('I', accumulate(counts, initial=0))
+        self._order = array('I', [0]) * self._starts[-1]
+        filled = array('I', self._starts[:-1])
+        for row, i in enumerate(cells):
+            if i >= 0:
+                self._order[filled[i]] = row
+                filled[i] += 1
+
+    @classmethod
+    def from_entities(cls, table, width: int, height: int = None, cell: int = 4) -> 'SpatialIndex':
+        """table 为 EntityTable，结果中的行号即 EntityTable 的行号"""
+        return cls(table.x, table.z, width, height, cell)
+
+    def __len__(self) -> int:
+        return self._starts[-1]
+
+    def __repr__(self):
+        return f'<SpatialIndex: {len(self)} points, {self._cols}x{self._rows} cells>'
+
+    def _col(self, x: float) -> int:
+        return min(max(floor(x / self.cell), 0), self._cols - 1)
+
+    def _row(self, y: float) -> int:
+        return min(max(floor(y / self.cell), 0), self._rows - 1)
+
+    def _cell(self, x: float, y: float) -> int:
+        return self._row(y) * self._cols + self._col(x)
+
+    def _rows_in(self, col0: int, row0: int, col1: int, row1: int) -> Iterable[int]:
+        """[col0, col1] x [row0, row1] 范围内各格中的行号"""
+        starts, order = self._starts, self._order
+        for row in range(row0, row1 + 1):
+            # 同一行中相邻的格在 _order 中是连续的
+            yield from order[starts[row * self._cols + col0]:starts[row * self._cols + col1 + 1]]
+
+    def _tile(self, x: float, y: float, world: bool) -> tuple[float, float]:
+        return world2tile(x, y, self.width, self.height) if world else (x, y)
+
+    def position(self, row: int, world: bool = False) -> tuple[float, float]:
+        """row 的坐标，world 为 True 时为世界坐标 (x, z)，否则为地皮坐标"""
+        if world:
+            return tile2world(self.x[row], self.y[row], self.width, self.height)
+        return self.x[row], self.y[row]
+
+    def positions(self, rows: Iterable[int], world: bool = False) -> list[tuple[float, float]]:
+        return [self.position(i, world) for i in rows]
+
+    def radius(self, x: float, y: float, radius: float, world: bool = False) -> list[int]:
+        """
+        与 (x, y) 距离不超过 radius 的行号，按距离从近到远排列
+        world 为 True 时 x、y 为世界坐标 (x, z)，radius 的单位也是世界坐标，否则单位为地皮
+        """
+        x, y = self._tile(x, y, world)
+        if world:
+            radius /= 4
+        limit, xs, ys = radius * radius, self.x, self.y
+        candidates = self._rows_in(self._col(x - radius), self._row(y - radius),
+                                   self._col(x + radius), self._row(y + radius))
+        found = [(d, i) for i in candidates if (d := (xs[i] - x) ** 2 + (ys[i] - y) ** 2) <= limit]
+        return [i for _, i in sorted(found)]
+
+    def rect(self, x0: float, y0: float, x1: float, y1: float, world: bool = False) -> list[int]:
+        """两个对角 (x0, y0)、(x1, y1) 围成的矩形中（含边界）的行号，从小到大排列"""
+        x0, y0 = self._tile(x0, y0, world)
+        x1, y1 = self._tile(x1, y1, world)
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        xs, ys = self.x, self.y
+        candidates = self._rows_in(self._col(x0), self._row(y0), self._col(x1), self._row(y1))
+        return sorted(i for i in candidates if x0 <= xs[i] <= x1 and y0 <= ys[i] <= y1)
+
+    def nearest(self, x: float, y: float, k: int = 1, world: bool = False) -> list[int]:
+        """离 (x, y) 最近的 k 个行号，按距离从近到远排列，从所在的格开始一圈圈向外查找"""
+        x, y = self._tile(x, y, world)
+        xs, ys, cell = self.x, self.y, self.cell
+        col, row = self._col(x), self._row(y)
+        found = []
+
+        def add(col0: int, row0: int, col1: int, row1: int):
+            found.extend(((xs[i] - x) ** 2 + (ys[i] - y) ** 2, i) for i in self._rows_in(
+                max(col0, 0), max(row0, 0), min(col1, self._cols - 1), min(row1, self._rows - 1)))
+
+        for ring in range(max(self._cols, self._rows)):
+            col0, col1, row0, row1 = col - ring, col + ring, row - ring, row + ring
+            # 只检查新的一圈格：上下两行，以及左右两列中除去这两行的部分
+            for r in {row0, row1}:
+                if 0 <= r < self._rows:
+                    add(col0, r, col1, r)
+            for c in {col0, col1}:
+                if 0 <= c < self._cols:
+                    add(c, row0 + 1, c, row1 - 1)
+            found = nsmallest(k, found)
+            if len(found) < k:
+                continue
+
+            # 还没有检查的格中的点，到 (x, y) 的距离不小于到已检查范围边界的距离，已经到达网格边缘的方向不需要考虑
+            bound = min(x - col0 * cell if col0 > 0 else inf, (col1 + 1) * cell - x if col1 < self._cols - 1 else inf,
+                        y - row0 * cell if row0 > 0 else inf, (row1 + 1) * cell - y if row1 < self._rows - 1 else inf)
+            if found[-1][0] <= bound * bound:
+                break
+        return [i for _, i in found]
@@ -2,18 +2,18 @@
 
 """
 将通过 TheSim:ZipAndEncodeString 压缩得到的字符串解码为 lua 代码字符串
-通过 lupa.lua51 运行 lua 代码得到返回值
-将返回值从 lua.table 格式转为 dict 并返回
+通过 lua_runtime 中复用的 lupa.lua51 运行，将返回值从 lua.table 格式转为 dict 并返回
+没有安装 lupa 时通过 lua_parser 直接解析 lua 代码得到返回值
 """
 
-import lupa.lua51 as lupa
-
 from klei_zip import decode as _decode
+from .lua_parser import loads
+from .lua_runtime import execute, lupa
 from .table2dict import Converter
 
 
 def decode(data: str):
     lua_script = _decode(data)
-
-    lua = lupa.LuaRuntime()
-    return Converter().table_dict(lua.execute(lua_script))
+    if lupa is None:
+        return loads(lua_script)
+    return Converter().table_dict(execute(lua_script))
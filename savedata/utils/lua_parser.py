@@ -0,0 +1,447 @@
+# -*- coding: utf-8 -*-
+
+"""
+存档及 TheSim:ZipAndEncodeString 得到的 lua 代码只是 table 构造式，不需要运行 lua 就可以直接解析为 dict
+这里只处理存档中会出现的语法，遇到其它语法时抛出 ValueError，由调用方改用 lupa 运行
+
+支持的语法
+    return {...}
+    local function name() return {...} end      2021.08.12 之后的存档按项生成函数，最后 return {map=name(), ...}
+    local name = {...}
+    {[1]=1, [2.5]=2, ["a"]=3, a=4, 5, "6", true, false, nil, name, name(), {...}}
+    数字（含十六进制、指数）、'' "" [[]] [=[]=] [==[]==] 字符串、-- 注释
+
+结果与 Converter().table_dict 一致：所有 table 都转为 dict，整数值的数字转为 int，值为 nil 的项不存在
+只是键的顺序按源码中的顺序，而不是 lua 中遍历的顺序
+"""
+
+from functools import cached_property
+from re import DOTALL, VERBOSE, compile
+from sys import intern
+from typing import Any, Iterator, Optional
+
+_STR = r'''"[^"\\\n]*(?:\\.[^"\\\n]*)*"|'[^'\\\n]*(?:\\.[^'\\\n]*)*\''''
+_NUM = r'(?:-\s*)?(?:0[xX][0-9A-Fa-f]+|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)'
+_LONG = r'\[\[.*?\]\]|\[=\[.*?\]=\]|\[==\[.*?\]==\]'
+
+# 整段代码一次 findall 切分为 token，通过首字符区分类型，比逐个 match 快得多
+# 结果为 (键名, token)，name= 形式的键与其后的值合为一项，以减少循环的次数
+# 不能识别的字符单独作为一个 token，解析时报错
+_TOKENS = compile(rf'''(?:([A-Za-z_]\w*)\s*=(?!=)\s*)?(
+     --(?:{_LONG}|(?!\[=*\[)[^\n]*)
+    |[A-Za-z_]\w*(?:\s*=(?!=)|\s*\(\s*\))?
+    |{_STR}
+    |{_NUM}
+    |[{{}},;]
+    |\[\s*(?:{_STR}|{_NUM})\s*\]\s*=(?!=)
+    |{_LONG}
+    |\S
+)''', VERBOSE | DOTALL)
+
+# table 中值为数字、字符串、名称，之后没有注释的一项，LuaTable 扫描时可以一次匹配整项
+# 不包含长字符串，其中的 .*? 会向后回溯到下一个分隔符
+_FIELD = compile(rf'''\s*(?:([A-Za-z_]\w*)\s*=(?!=)\s*|(\[\s*(?:{_STR}|{_NUM})\s*\])\s*=(?!=)\s*)?
+    ({_STR}|{_NUM}|[A-Za-z_]\w*)\s*(?:[,;]|(?=}}))''', VERBOSE)
+
+_SPACE = compile(r'\s*')
+_LONG_OPEN = compile(r'\[(=*)\[\n?')
+_ESCAPE = compile(rb'\\(?:(\d{1,3})|(.))', DOTALL)
+_ESCAPES = {b'a': b'\a', b'b': b'\b', b'f': b'\f', b'n': b'\n', b'r': b'\r', b't': b'\t', b'v': b'\v', b'\n': b'\n'}
+# 跳过 table 时只需要关心括号，以及可能包含括号的字符串、注释
+_SKIP = compile(r'''[{}"'\[]|--''')
+_STR_BODY = {'"': compile(r'[^"\\\n]*(?:\\.[^"\\\n]*)*"', DOTALL), "'": compile(r"[^'\\\n]*(?:\\.[^'\\\n]*)*'", DOTALL)}
+
+_LOCAL_FUNCTION = compile(r'local\s+function\s+([A-Za-z_]\w*)\s*\(\s*\)\s*return\b')
+_LOCAL = compile(r'local\s+([A-Za-z_]\w*)\s*=(?!=)')
+_RETURN = compile(r'return\b')
+_END = compile(r'\s*;?\s*end\b')
+
+_CONSTANTS = {'true': True, 'false': False, 'nil': None}
+_NUMBER_START = frozenset('0123456789-.')
+# 值的首字符：数字、字符串、长字符串、名称
+_VALUE_START = frozenset('0123456789-.\'"[_abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
+
+# table 中还没有出现键
+_NOKEY = object()
+
+arg_span = tuple[int, int]
+
+
+def _number(text: str) -> Any:
+    """lua 5.1 中数字都是 double，lupa 会把整数值的数字转为 int"""
+    if text.isdigit() and len(text) < 16:
+        return int(text)
+    try:
+        value = float(text)
+    except ValueError:
+        # 十六进制，或负号后有空白
+        text = ''.join(text.split())
+        digits = text.lstrip('-')
+        value = float(int(digits, 16)) if digits[:2] in ('0x', '0X') else float(digits)
+        if text[0] == '-':
+            value = -value
+    if value.is_integer() and -0x8000000000000000 <= value < 0x8000000000000000:
+        return int(value)
+    return value
+
+
+def _escape(match) -> bytes:
+    if match[1] is not None:
+        if (code := int(match[1])) > 255:
+            raise ValueError(f'字符串中的转义 \\{match[1]} 超出范围')
+        return bytes((code,))
+    return _ESCAPES.get(match[2], match[2])
+
+
+def _string(text: str) -> str:
+    text = text[1:-1]
+    if '\\' not in text:
+        return text
+    try:
+        return _ESCAPE.sub(_escape, text.encode('utf-8')).decode('utf-8')
+    except UnicodeDecodeError:
+        raise ValueError('字符串不是 utf-8 编码') from None
+
+
+def _long_string(text: str, pos: int) -> tuple[str, int]:
+    """pos 指向 [=*[，返回字符串内容与结束位置"""
+    match = _LONG_OPEN.match(text, pos)
+    if match is None:
+        raise _error(text, pos)
+    end = text.find(f']{match[1]}]', match.end())
+    if end < 0:
+        raise ValueError(f'位置 {pos} 处的长字符串没有结束')
+    return text[match.end():end], end + len(match[1]) + 2
+
+
+def _comment(text: str, pos: int) -> int:
+    """pos 指向 --，返回注释结束的位置"""
+    if _LONG_OPEN.match(text, pos + 2):
+        return _long_string(text, pos + 2)[1]
+    end = text.find('\n', pos)
+    return len(text) if end < 0 else end
+
+
+def _space(text: str, pos: int) -> int:
+    """跳过空白与注释"""
+    while True:
+        pos = _SPACE.match(text, pos).end()
+        if not text.startswith('--', pos):
+            return pos
+        pos = _comment(text, pos)
+
+
+def _error(text: str, pos: int) -> ValueError:
+    if pos >= len(text):
+        return ValueError('lua 代码不完整')
+    return ValueError(f'位置 {pos} 处存在不支持的语法 {text[pos:pos + 20]!r}')
+
+
+def _token_error(token: str) -> ValueError:
+    return ValueError(f'存在不支持的语法 {token[:20]!r}')
+
+
+def _close(explicit: dict, items: list) -> dict:
+    """合并 table 中按位置与按键给出的值"""
+    if not items:
+        return explicit
+    result = {i: v for i, v in enumerate(items, 1) if v is not None}
+    if explicit:
+        count = len(items)
+        if any(type(k) is int and 0 < k <= count for k in explicit):
+            # 位置与键重复时，结果取决于 lua 的实现细节
+            raise ValueError('table 中存在重复的整数键')
+        result.update(explicit)
+    return result
+
+
+def _bracket_key(token: str) -> Any:
+    """[key]= 中的键"""
+    key = token[1:token.rindex(']')].strip()
+    return _string(key) if key[0] in '"\'' else _number(key)
+
+
+class LuaChunk:
+    """
+    一段只包含上述语法的 lua 代码
+    创建时只确定 local 定义与 return 的值所在的范围，值在用到时才解析
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        # local 名称 -> (值的范围, 是否为函数)
+        self.env: dict[str, tuple[arg_span, bool]] = {}
+        self.root = self._statements()
+
+    def _statements(self) -> arg_span:
+        text, pos = self.text, 0
+        while True:
+            pos = _space(text, pos)
+            if match := _LOCAL_FUNCTION.match(text, pos):
+                start = _space(text, match.end())
+                self.env[match[1]] = (start, end := self.skip(start)), True
+                if not (match := _END.match(text, end)):
+                    raise _error(text, end)
+                pos = match.end()
+            elif match := _LOCAL.match(text, pos):
+                start = _space(text, match.end())
+                self.env[match[1]] = (start, pos := self.skip(start)), False
+            elif match := _RETURN.match(text, pos):
+                start = _space(text, match.end())
+                end = self.skip(start)
+                pos = _space(text, end)
+                if text.startswith(';', pos):
+                    pos = _space(text, pos + 1)
+                if pos != len(text):
+                    raise _error(text, pos)
+                return start, end
+            else:
+                raise _error(text, pos)
+
+    def _reference(self, token: str) -> arg_span:
+        """token 为 name 或 name()，返回引用的值的范围"""
+        name = token.split('(')[0].rstrip()
+        if name not in self.env:
+            raise ValueError(f'未定义的变量 {name}')
+        span, is_function = self.env[name]
+        if is_function != token.endswith(')'):
+            raise _token_error(token)
+        return span
+
+    def resolve(self, span: arg_span) -> arg_span:
+        """值为 local 变量或函数调用时，返回实际值的范围"""
+        while True:
+            token = self.text[span[0]:span[1]]
+            if not (token[0].isalpha() or token[0] == '_') or token in _CONSTANTS:
+                return span
+            span = self._reference(token)
+
+    def skip(self, pos: int) -> int:
+        """跳过一个值，返回其结束的位置，不检查 table 内部的语法"""
+        text = self.text
+        if not text.startswith('{', pos):
+            match = _TOKENS.match(text, pos)
+            token = match and not match[1] and match[2]
+            if not token or token[-1] == '=' or token.startswith('--') or token[0] not in _VALUE_START:
+                raise _error(text, pos)
+            return match.end()
+
+        depth, search = 0, _SKIP.search
+        while match := search(text, pos):
+            char, pos = match[0], match.end()
+            if char == '{':
+                depth += 1
+            elif char == '}':
+                depth -= 1
+                if not depth:
+                    return pos
+            elif char == '[':
+                if _LONG_OPEN.match(text, pos - 1):
+                    pos = _long_string(text, pos - 1)[1]
+            elif char == '--':
+                pos = _comment(text, pos - 2)
+            elif not (body := _STR_BODY[char].match(text, pos)):
+                raise _error(text, pos - 1)
+            else:
+                pos = body.end()
+        raise ValueError('lua 代码不完整，table 没有结束')
+
+    def parse(self, span: arg_span) -> Any:
+        """
+        解析 span 范围内的值，转换为 python 对象
+        table 使用显式的栈处理，嵌套再深也不会递归
+        local 变量与函数每次引用都会重新解析，得到新的 dict，与 lua 中每次调用都创建新 table 一致
+        """
+        stack = []
+        # 当前 table 中按键给出的值、按位置给出的值、等待赋值的键，不在 table 中时 table 为 None
+        table, items, key = None, None, _NOKEY
+        expect_value, value = True, None
+        # 按 token 出现的频率排列判断的顺序
+        for name, token in _TOKENS.findall(self.text, *span):
+            if name:
+                if not expect_value or table is None or key is not _NOKEY:
+                    raise _token_error(name)
+                # 键名在存档中重复出现十几万次，共享同一个字符串以节省内存
+                key = intern(name)
+            char = token[0]
+            if char == ',' or char == ';':
+                if expect_value or table is None:
+                    raise _token_error(token)
+                expect_value = True
+                continue
+            elif token[-1] == '=' and char != '-':
+                if not expect_value or table is None or key is not _NOKEY or token == '=':
+                    raise _token_error(token)
+                key = _bracket_key(token) if char == '[' else intern(token[:-1].rstrip())
+                continue
+            elif char == '}':
+                if table is None or expect_value and key is not _NOKEY:
+                    raise _token_error(token)
+                value = table if items is None else _close(table, items)
+                table, items, key = stack.pop()
+            elif not expect_value:
+                if not token.startswith('--'):
+                    raise _token_error(token)
+                continue
+            elif char == '{':
+                stack.append((table, items, key))
+                # 大部分 table 中没有按位置给出的值，用到时才创建列表
+                table, items, key = {}, None, _NOKEY
+                continue
+            elif char in _NUMBER_START:
+                try:
+                    value = float(token)
+                except ValueError:
+                    if token.startswith('--'):
+                        continue
+                    value = _number(token)
+                else:
+                    if value.is_integer() and -0x8000000000000000 <= value < 0x8000000000000000:
+                        value = int(value)
+            elif char == '"' or char == "'":
+                value = token[1:-1] if '\\' not in token else _string(token)
+            elif char == '[':
+                value = _long_string(token, 0)[0]
+            elif not (char.isalpha() or char == '_'):
+                raise _token_error(token)
+            elif token in _CONSTANTS:
+                value = _CONSTANTS[token]
+            else:
+                value = self.parse(self._reference(token))
+
+            expect_value = False
+            if table is None:
+                continue
+            if key is _NOKEY:
+                if items is None:
+                    items = [value]
+                else:
+                    items.append(value)
+            elif value is None:
+                table.pop(key, None)
+                key = _NOKEY
+            else:
+                table[key] = value
+                key = _NOKEY
+
+        if expect_value or table is not None:
+            raise ValueError('lua 代码不完整')
+        return value
+
+
+class LuaTable:
+    """
+    table 构造式的惰性视图，第一次访问时只解析各项的键，值在访问时才解析
+    t[key] 得到完全转换后的值，t.table(key) 得到子 table 的惰性视图，键不存在时均返回 None，与 lupa 一致
+    """
+
+    def __init__(self, chunk: LuaChunk, span: arg_span):
+        self._chunk = chunk
+        start, end = chunk.resolve(span)
+        if not chunk.text.startswith('{', start):
+            raise ValueError(f'位置 {start} 处的值不是 table')
+        self._start = start + 1
+
+    @cached_property
+    def _fields(self) -> dict[Any, arg_span]:
+        # 第一次用到时才扫描，只是作为句柄传递的 table 不需要扫描
+        return self._scan(self._start)
+
+    def _scan(self, pos: int) -> dict[Any, arg_span]:
+        """记录 table 中各项的键及值的范围"""
+        chunk, text = self._chunk, self._chunk.text
+        fields, index, keys = {}, 0, []
+        while True:
+            if match := _FIELD.match(text, pos):
+                name, bracket, value = match.groups()
+                if name:
+                    key = intern(name)
+                elif bracket:
+                    key = _bracket_key(bracket)
+                    keys.append(key)
+                else:
+                    index += 1
+                    key = index
+                if value == 'nil':
+                    fields.pop(key, None)
+                else:
+                    fields[key] = match.span(3)
+                pos = match.end()
+                continue
+            if text.startswith('}', pos := _space(text, pos)):
+                break
+
+            match = _TOKENS.match(text, pos)
+            if match is None:
+                raise _error(text, pos)
+            if match[1]:
+                key, pos = intern(match[1]), match.start(2)
+            elif match[2][-1] == '=' and match[2][0] == '[':
+                key, pos = _bracket_key(match[2]), match.end()
+                keys.append(key)
+            else:
+                index += 1
+                key = index
+
+            start = _space(text, pos)
+            end = chunk.skip(start)
+            if text.startswith('nil', start) and end == start + 3:
+                fields.pop(key, None)
+            else:
+                fields[key] = start, end
+            pos = _space(text, end)
+            if text.startswith((',', ';'), pos):
+                pos += 1
+            elif not text.startswith('}', pos):
+                raise _error(text, pos)
+
+        if index and any(type(k) is int and 0 < k <= index for k in keys):
+            raise ValueError('table 中存在重复的整数键')
+        return fields
+
+    def __iter__(self) -> Iterator:
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def __contains__(self, key) -> bool:
+        return key in self._fields
+
+    def keys(self):
+        return self._fields.keys()
+
+    def __getitem__(self, key) -> Any:
+        if key not in self._fields:
+            return None
+        return self._chunk.parse(self._fields[key])
+
+    @property
+    def text(self) -> str:
+        return self._chunk.text
+
+    def span(self, key) -> Optional[arg_span]:
+        """值在 text 中的范围，值为 local 变量或函数调用时是实际值的范围"""
+        if key not in self._fields:
+            return None
+        return self._chunk.resolve(self._fields[key])
+
+    def table(self, key) -> Optional['LuaTable']:
+        if key not in self._fields:
+            return None
+        return LuaTable(self._chunk, self._fields[key])
+
+    def __repr__(self):
+        return f'<LuaTable: {list(self._fields)}>'
+
+
+def loads(text: str) -> Any:
+    """解析 lua 代码，返回 return 的值，效果同 Converter().table_dict(lua.execute(text))"""
+    chunk = LuaChunk(text)
+    return chunk.parse(chunk.root)
+
+
+def load(text: str) -> LuaTable:
+    """同 loads，但 return 的值必须是 table，并且只在访问时才解析其中的各项"""
+    chunk = LuaChunk(text)
+    return LuaTable(chunk, chunk.root)
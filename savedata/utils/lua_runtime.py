@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+"""
+可复用的 lua 运行环境，lua_parser 无法解析的 lua 代码在这里运行
+每个线程持有一个 LuaRuntime，lupa 的 runtime 同一时间只能被一个线程使用，线程之间不共享
+每次运行时 lua 代码的全局环境都是一个新的空 table，不能访问库函数与 python，也不会留下全局变量影响下次运行
+lupa 是可选的，没有安装时 lupa 为 None
+"""
+
+from threading import Lock, local
+
+try:
+    import lupa.lua51 as lupa
+except ImportError:
+    lupa = None
+
+# 在空的全局环境中运行 lua 代码，只返回第一个值
+_RUNNER = '''
+function(code)
+    local fn, err = loadstring(code, "=savedata")
+    if not fn then
+        error(err, 0)
+    end
+    return (setfenv(fn, {})())
+end
+'''
+
+_local = local()
+_lock = Lock()
+_created = 0
+
+
+def created() -> int:
+    """创建过的 LuaRuntime 的数量，所有线程合计"""
+    return _created
+
+
+def _runner():
+    if (runner := getattr(_local, 'runner', None)) is not None:
+        return runner
+    if lupa is None:
+        raise ValueError('需要安装 lupa 才能运行 lua 代码')
+
+    global _created
+    runtime = lupa.LuaRuntime(register_eval=False, register_builtins=False)
+    _local.runner = runtime.eval(_RUNNER)
+    with _lock:
+        _created += 1
+    return _local.runner
+
+
+def execute(code: str):
+    """运行 lua 代码，返回 return 的值，table 为 lupa 的 table"""
+    return _runner()(code)
+
+
+def reset():
+    """丢弃当前线程的 LuaRuntime，其中的 table 不再被引用后内存才会释放，下次运行时重新创建"""
+    _local.__dict__.pop('runner', None)
@@ -2,30 +2,90 @@
 
 """
 将 lua.table 格式简单的转换为 dict 格式
+lupa 是可选的，lua_parser 无法解析时才需要用 lupa 运行 lua 代码
 """
 
-import lupa.lua51 as lupa
+from sys import intern
+
+from .lua_runtime import execute, lupa
 
 
 class Converter:
+    """
+    lists 为 True 时，键正好是 1 到 n 的 table 转为 list，否则所有 table 都转为 dict
+    空 table 没法区分应该是 dict 还是 list，总是转为 dict
+    intern_keys 为 True 时，字符串键通过 sys.intern 共享，实例很多的存档中 prefab 名等键会重复十几万次
+    """
 
-    def __init__(self):
-        self.lua = lupa.LuaRuntime()
+    def __init__(self, lists: bool = False, intern_keys: bool = False):
+        self.lists = lists
+        self.intern_keys = intern_keys
 
     def table_dict(self, lua_table):
+        """使用显式的栈遍历，嵌套再深也不会 RecursionError"""
+        root = [None]
+        # (lua table, 父容器, 在父容器中的键)，子 table 先占位，轮到它时再创建容器并放回父容器
+        stack = [(lua_table, root, 0)]
+        lua_type, lists, intern_keys = lupa.lua_type, self.lists, self.intern_keys
+        while stack:
+            value, parent, index = stack.pop()
+            match typel := lua_type(value):
+
+                case None:  # ['nil', 'boolean', 'number', 'string'] -> python type
+                    parent[index] = value
+                    continue
+
+                case 'table':
+                    pass
+
+                case _:
+                    parent[index] = f'this is a {typel}'
+                    continue
+
+            items = list(value.items())
+            if lists and items and self._is_list(items):
+                result = [None] * len(items)
+                for key, item in items:
+                    stack.append((item, result, key - 1))
+            else:
+                result = {}
+                for key, item in items:
+                    if intern_keys and type(key) is str:
+                        key = intern(key)
+                    # 先占位，保持键的顺序与 lua 中遍历的顺序一致
+                    result[key] = None
+                    stack.append((item, result, key))
+            parent[index] = result
+        return root[0]
+
+    @staticmethod
+    def _is_list(items: list) -> bool:
+        """键互不相同，全部是整数且最小为 1、最大为数量时，正好是 1 到 n"""
+        keys = [key for key, _ in items]
+        if not all(type(key) is int for key in keys):
+            return False
+        return min(keys) == 1 and max(keys) == len(keys)
+
+
+class LupaTable:
+    """lupa 运行得到的 table，接口与 lua_parser.LuaTable 一致，t[key] 得到转换后的值"""
+
+    def __init__(self, lua_table):
+        self._table = lua_table
+
+    @classmethod
+    def execute(cls, text: str) -> 'LupaTable':
+        return cls(execute(text))
 
-        match typel := lupa.lua_type(lua_table):
+    def __iter__(self):
+        return iter(self._table)
 
-            case None:  # ['nil', 'boolean', 'number', 'string'] -> python type
-                return lua_table
+    def __getitem__(self, key):
+        return Converter().table_dict(self._table[key])
 
-            case 'table':
-                # 因为没法区分 空 table 应该是 dict 还是 list，所以都转为 dict
-                # keys = list(lua_table)
-                # # 假如lupa.table为空，或keys从数字 1 开始并以 1 为单位递增，则认为是列表，否则为字典。其他情况有点复杂，就这样吧
-                # if not len(keys) or keys[0] == 1 and all(map(lambda x: keys[x] + 1 == keys[x + 1], range(len(keys) - 1))):
-                #     return [self._table_dict(x) for x in lua_table.values()]
-                return {x: self.table_dict(y) for x, y in lua_table.items()}
+    def table(self, key):
+        value = self._table[key]
+        return LupaTable(value) if lupa.lua_type(value) == 'table' else None
 
-            case _:
-                return f'this is a {typel}'
+    def __repr__(self):
+        return f'<LupaTable: {list(self._table)}>'
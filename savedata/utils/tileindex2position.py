@@ -2,9 +2,14 @@
 """
 将地皮索引转为地皮的坐标值
 """
+from typing import NamedTuple
 
 
 class PointPos:
+    """
+    全局的地图宽度，同一进程中只能有一个地图，多线程读取不同大小的地图时结果会出错
+    只为兼容原本的用法保留，验证数据时不会使用，需要使用 CoordContext
+    """
     map_width: int = None
 
     @classmethod
@@ -22,3 +27,54 @@ class PointPos:
     @ classmethod
     def init(cls, map_width: int):
         cls.map_width = map_width
+
+
+class CoordContext(NamedTuple):
+    """
+    一个地图的地皮索引与坐标的转换，与 PointPos 的用法一致
+    Map 按自己的 width 创建，单独验证 Persistdata 等数据时放在 pydantic 的 context 中传入：
+        Persistdata.model_validate(data, context=CoordContext(width).context())
+    每个地图各自一个，多线程同时读取不同的地图也互不影响
+    """
+    map_width: int
+
+    def pos2index(self, pos: tuple[int, int]) -> int:
+        if self.map_width is None:
+            raise ValueError('地图宽度未知，无法转换地皮索引')
+        return pos[0] + pos[1] * self.map_width
+
+    def index2_pos(self, tile_index: int) -> tuple[int, int]:
+        if self.map_width is None:
+            raise ValueError('地图宽度未知，无法转换地皮索引')
+        return tuple(divmod(tile_index, self.map_width)[::-1])
+
+    def context(self) -> dict:
+        """作为 pydantic 验证的 context"""
+        return {'coord': self}
+
+
+def coord_context(info) -> CoordContext:
+    """验证时 info.context 中的 CoordContext"""
+    context = info.context
+    if isinstance(context, dict) and isinstance(coord := context.get('coord'), CoordContext):
+        return coord
+    raise ValueError('验证的 context 中没有 CoordContext，无法转换地皮索引，'
+                     '需要 model_validate(data, context=CoordContext(width).context())')
+
+
+def _center(size: int) -> float:
+    # 地图中心，即世界坐标原点在地皮坐标中的位置，见 map2svg/map.py 末尾的说明
+    return (size - 1) / 2 + 1
+
+
+def world2tile(x: float, z: float, width: int, height: int = None) -> tuple[float, float]:
+    """
+    游戏内的世界坐标转为地皮坐标，地皮坐标与 index2_pos 一致，整数部分就是所在地皮
+    每块地皮边长为 4，世界坐标的 x、z 与地皮坐标的轴是对调的
+    """
+    return z / 4 + _center(width if height is None else height), x / 4 + _center(width)
+
+
+def tile2world(x: float, y: float, width: int, height: int = None) -> tuple[float, float]:
+    """world2tile 的逆变换，返回世界坐标 (x, z)"""
+    return (y - _center(width)) * 4, (x - _center(width if height is None else height)) * 4
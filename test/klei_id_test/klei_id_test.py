@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+from random import Random
+
+from pytest import raises
+
+from klei_id import convert, convert_many, k2i, i2k, k2i_many, i2k_many, IDType, KUIDIndex
+from klei_id.klei_id import alphabet64
+
+mix = ["KU_UnXyKKKK", "A7G2Q0NNBBBB", "A7GKKKKNMK3P", "A7G2Q0NMMMMJ", "_0GGC", "A7GASDFGHJKL", "KU_UnXyZZZZ",
+       "KUabcdefgh", "KU你好", "__0123", "00000000000V"]
+
+
+def _kuids(count: int) -> list[str]:
+    rand = Random(0)
+    return ['KU_' + ''.join(rand.choice(alphabet64) for _ in range(8)) for _ in range(count)]
+
+
+def test_convert_many():
+    kuids = _kuids(1000)
+    dirnames = [convert(i) for i in kuids]
+    assert convert_many(kuids) == dirnames
+    assert convert_many(dirnames, IDType.dirname) == kuids
+
+    ids = mix + kuids + dirnames
+    assert convert_many(ids) == [convert(i) for i in ids]
+    assert convert_many(mix[:2] + kuids, IDType.kleiID) == [convert(i, IDType.kleiID) for i in mix[:2] + kuids]
+
+
+def test_int():
+    kuids = _kuids(1000)
+    assert [i2k(k2i(i)) for i in kuids] == kuids
+    assert k2i_many(kuids) == [k2i(i) for i in kuids] and i2k_many(k2i_many(kuids)) == kuids
+    assert sorted(kuids, key=k2i) == sorted(kuids, key=lambda x: [alphabet64.index(i) for i in x[3:]])
+    assert k2i('KU_00000000') == 0 and k2i('KU_' + '_' * 8) == (1 << 48) - 1
+
+    with raises(ValueError):
+        k2i('A7G2Q0NNBBBB')
+    with raises(ValueError):
+        k2i_many(kuids + ['A7G2Q0NNBBB'])
+    with raises(ValueError):
+        i2k_many([1 << 48])
+    with raises(ValueError):
+        i2k(1 << 48)
+
+
+def test_index(tmp_path):
+    kuids = _kuids(1000) + ['KU_UnXyKKKK', 'KU_UnXyZZZZ', 'KU_UnXyKKKK']
+    index = KUIDIndex.from_kuids(kuids)
+    expected = sorted(set(kuids), key=k2i)
+    assert index.kuids() == expected
+    assert len(index) == len(expected)
+    assert 'KU_UnXyZZZZ' in index and 'KU_UnXyZZZY' not in index
+
+    assert index.with_prefix('KU_UnXy') == ['KU_UnXyKKKK', 'KU_UnXyZZZZ']
+    assert index.between('KU_UnXyKKKK', 'KU_UnXyZZZZ') == ['KU_UnXyKKKK', 'KU_UnXyZZZZ']
+    assert sum(index.prefix_histogram(1).values()) == len(index)
+    split = index.split(5)
+    assert split['UnXyK'] == ['KKK'] and split['UnXyZ'] == ['ZZZ']
+
+    index.save(tmp_path / 'kuids.bin')
+    assert KUIDIndex.load(tmp_path / 'kuids.bin').kuids() == expected
+
+
+def test_harvest(tmp_path):
+    from io import BytesIO
+    from re import findall
+    from klei_id import harvest, harvest_stream
+
+    rand = Random(1)
+    kuids = _kuids(200)
+    words = kuids + ['KU_', 'KU_abc', 'xKU_', '中文', ' ', '\n', ',', 'KU_' + 'a' * 12]
+    texts = [''.join(rand.choice(words) + rand.choice(' \n,') * rand.randint(0, 1) for _ in range(3000))
+             for _ in range(3)]
+    for i, text in enumerate(texts):
+        (tmp_path / f'{i}.log').write_text(text, encoding='utf-8')
+    (tmp_path / 'empty.log').write_bytes(b'')
+    expected = [findall('KU_[0-9a-zA-Z-_]{8}', i) for i in texts]
+
+    result = harvest(tmp_path, workers=1, chunk_size=7)
+    assert result.index.kuids() == sorted(set(sum(expected, [])), key=k2i)
+    reports = {i.path.name: i for i in result.files}
+    assert reports['empty.log'].count == 0
+    for i, found in enumerate(expected):
+        assert (reports[f'{i}.log'].count, reports[f'{i}.log'].unique) == (len(found), len(set(found)))
+        for chunk_size in (1, 5, 11, 64, 1 << 20):
+            count, unique = harvest_stream(BytesIO(texts[i].encode('utf-8')), chunk_size)
+            assert (count, sorted(unique)) == (len(found), sorted({j.encode('ascii') for j in found}))
+
+    assert harvest(tmp_path, workers=2).index.data == result.index.data
+
+
+def test_main(tmp_path, capsysbinary):
+    from klei_id.__main__ import main
+
+    kuids = _kuids(100)
+    dirnames = [convert(i) for i in kuids]
+    (tmp_path / 'ids.txt').write_text('\n'.join(kuids + ['!!']) + '\n', encoding='utf-8')
+    assert main([str(tmp_path / 'ids.txt'), '--batch-size', '7']) == 1
+    assert capsysbinary.readouterr().out.decode('utf-8').split('\n') == dirnames + ['', '']
+
+    client_save = tmp_path / 'client_save'
+    for i in dirnames[:10]:
+        (client_save / i).mkdir(parents=True)
+    assert main([str(client_save), '--type', 'dirname', '--pair', '--workers', '2', '--batch-size', '3']) == 0
+    lines = capsysbinary.readouterr().out.decode('utf-8').splitlines()
+    assert lines == [f'{convert(i)}\t{i}' for i in sorted(kuids[:10], key=convert)]
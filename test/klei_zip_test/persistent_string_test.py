@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+from base64 import b64decode, b64encode
+from io import BytesIO, StringIO
+from pathlib import Path
+
+from pytest import raises
+
+from klei_zip import (
+    encode,
+    decode,
+    decode_stream,
+    decode_bytes,
+    encode_bytes,
+    parse_header,
+    decode_many,
+    encode_many,
+    scan,
+    CodecCache,
+    MODE_ZIP,
+    MODE_RAW
+)
+from klei_zip.benchmark import conformance
+from klei_zip.persistent_example import var
+
+
+def test_decode_stream():
+    for raw, encoded in var.items():
+        chunks = [encoded[i:i + 3] for i in range(0, len(encoded), 3)]
+        assert ''.join(decode_stream(chunks)) == decode(encoded)
+
+    raw = '你好，KLEI\n' * 10000
+    encoded = encode(raw)
+    assert ''.join(decode_stream(StringIO(encoded), 1000)) == raw
+    assert ''.join(decode_stream(BytesIO(encoded.encode('ascii') + b'\x00'), 777)) == raw
+    assert ''.join(decode_stream(['KLEI     1 ', 'text'])) == decode('KLEI     1 text')
+
+
+def test_parse_header():
+    for raw, encoded in var.items():
+        header = parse_header(encoded)
+        assert header.mode == MODE_ZIP
+        assert header.len_raw == len(raw.split('\x00')[0].encode('utf-8'))
+        assert parse_header(encoded.encode('ascii')[11:] + b'\n') == header
+
+    assert parse_header('KLEI     1 text').mode == MODE_RAW
+    with raises(ValueError):
+        parse_header(encode('1' * 4096)[:-8])
+    with raises(ValueError):
+        parse_header('return {}')
+
+
+def test_decode_length_check():
+    encoded = encode('KLEI' * 1000)
+    data_full = bytearray(b64decode(encoded[11:]))
+    # 篡改头部记录的压缩前长度
+    data_full[8] += 1
+    broken = 'KLEI     1D' + b64encode(data_full).decode('ascii')
+    with raises(ValueError):
+        decode(broken)
+    with raises(ValueError):
+        ''.join(decode_stream(broken))
+
+
+def test_many(tmp_path: Path):
+    raws = [str(i) * i for i in range(50)]
+    encoded = encode_many(raws, workers=2)
+    assert encoded == [encode(i) for i in raws]
+    assert decode_many(encoded, workers=2, executor='thread') == raws
+
+    file = tmp_path / 'modconfiguration'
+    file.write_text(encoded[-1], encoding='utf-8')
+    assert decode_many([file, encoded[1]], workers=1) == [raws[-1], raws[1]]
+
+
+def test_bytes():
+    for raw, encoded in var.items():
+        assert encode_bytes(raw.encode('utf-8')) == encoded.encode('ascii')
+        assert bytes(decode_bytes(memoryview(encoded.encode('ascii')))) == decode(encoded).encode('utf-8')
+    assert encode_bytes(bytearray(b'1\x001'), encode=False) == encode('1\x001', encode=False).encode('ascii')
+
+
+def test_scan(tmp_path: Path):
+    (tmp_path / 'session').mkdir()
+    (tmp_path / 'zip').write_text(encode('KLEI' * 100), encoding='utf-8')
+    (tmp_path / 'session' / 'raw').write_text(encode('KLEI', encode=False), encoding='utf-8')
+    (tmp_path / 'plain').write_text('return {}', encoding='utf-8')
+    (tmp_path / 'broken').write_text(encode('KLEI' * 100)[:-4], encoding='utf-8')
+    (tmp_path / 'empty').write_text('', encoding='utf-8')
+
+    files = {i.path.name: i for i in scan(tmp_path)}
+    assert files['zip'].mode == MODE_ZIP and files['zip'].header.len_raw == 400
+    assert files['zip'].decode() == 'KLEI' * 100
+    assert files['raw'].mode == MODE_RAW and files['raw'].header is None
+    assert files['plain'].mode is None and files['plain'].decode() == 'return {}'
+    assert files['broken'].mode == MODE_ZIP and files['broken'].error
+    assert files['empty'].mode is None and files['empty'].decode() == ''
+
+
+def test_cache():
+    cache = CodecCache(maxsize=8)
+    for _ in range(2):
+        for raw, encoded in var.items():
+            assert cache.encode(raw) == encoded
+            assert cache.decode(encoded) == decode(encoded)
+    assert len(cache) == 8
+    assert cache.misses == 4 * len(var)
+
+    cache = CodecCache()
+    assert cache.encode('KLEI') == cache.encode('KLEI') == encode('KLEI')
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.clear()
+    assert (len(cache), cache.hits, cache.misses, cache.nbytes) == (0, 0, 0, 0)
+
+
+def test_conformance():
+    assert conformance()['failed'] == []
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from base64 import b64encode
+from struct import pack
+
+from pytest import fixture
+
+
+def _vrsn(fmt: str, *values) -> str:
+    return b64encode(b'VRSN\x00\x01\x00\x00\x00' + pack(fmt, *values)).decode('ascii')
+
+
+@fixture
+def vrsn():
+    """按 struct 的格式打包后编码为地图数据，例如 vrsn('<4H', 1, 2, 3, 4)"""
+    return _vrsn
+
+
+@fixture
+def save_path(tmp_path):
+    """2x2 的地图，tiles 为 [1, 2, 3, 4]，tiledata 为 [0, 1, 2, 3]，两个 spider"""
+    tiles = _vrsn('<4H', 1, 2, 3, 4)
+    tiledata = _vrsn('<8B', 0, 0x70, 0, 0x71, 0, 0x72, 0, 0x73)
+    path = tmp_path / '0000000001'
+    path.write_text(
+        'return {map={tiles="%s", tiledata="%s", prefab="forest", width=2, height=2, persistdata={}}, '
+        'meta={saveversion=5.1, build="000"}, world_network={persistdata={}}, mods={}, '
+        'ents={spider={{x=1, z=2}, {x=3, z=4}}}, extra={a=1}}\x00' % (tiles, tiledata), encoding='utf-8')
+    return path
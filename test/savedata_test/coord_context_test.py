@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from concurrent.futures import ThreadPoolExecutor
+
+from klei_zip import encode
+from pytest import raises
+
+from savedata import SaveData
+from savedata.map import Map
+from savedata.map.persistdata.undertile import Undertile
+from savedata.utils.tileindex2position import CoordContext, PointPos
+
+
+def test_coord_context(save_path, tmp_path, vrsn):
+    undertile = encode('return {underneath_tiles={[5]=30}}')
+    paths = []
+    for width in (2, 3):
+        path = tmp_path / str(width)
+        path.write_text(save_path.read_text(encoding='utf-8').replace(
+            'width=2', f'width={width}').replace(
+            'persistdata={}}', 'persistdata={undertile={str="%s"}}}' % undertile, 1), encoding='utf-8')
+        paths.append(path)
+
+    # 不同宽度的地图同时读取，各自按自己的宽度转换，不受全局的 PointPos 影响
+    PointPos.init(7)
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda p: SaveData(p).persistdata.undertile.underneath_tiles, paths * 20))
+        maps = list(pool.map(lambda p: SaveData(p).map.persistdata.undertile.underneath_tiles, paths * 20))
+    PointPos.init(None)
+    assert results == maps == [{(1, 2): 30}, {(2, 1): 30}] * 20
+
+    assert Undertile.model_validate({'str': undertile}, context=CoordContext(5).context()).underneath_tiles == {(0, 1): 30}
+    # Map 按自己的 width 转换
+    map_ = Map(tiles=vrsn('<6H', *range(6)), prefab='forest', width=3, height=2,
+               persistdata={'undertile': {'str': undertile}})
+    assert map_.persistdata.undertile.underneath_tiles == {(2, 1): 30}
+    # 没有 context 时报错，不会使用全局的宽度
+    with raises(ValueError):
+        Undertile(str=undertile)
+    with raises(ValueError):
+        Undertile.model_validate({'str': undertile}, context=CoordContext(None).context())
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from math import isnan
+
+from savedata import SaveData
+from savedata.entity import EntityRecord, EntityTable
+
+
+def test_entity_table():
+    table = EntityTable.from_records([
+        EntityRecord('beefalo', 1, 2), EntityRecord('grass', 3, 4, {'a': 1}),
+        EntityRecord('beefalo', 5, 6), EntityRecord('rock1', None, 7),
+    ])
+    assert len(table) == 4 and table.prefabs == ['beefalo', 'grass', 'rock1']
+    assert table.counts() == {'beefalo': 2, 'grass': 1, 'rock1': 1}
+    assert table.rows('beefalo') == range(0, 2) and table.count('skeleton_player') == 0
+    assert [list(i) for i in table.positions('beefalo')] == [[1, 5], [2, 6]]
+    assert table.select('grass')[0].data == {'a': 1}
+    assert isnan(table[3].x) and table[3].prefab == 'rock1'
+    assert [i.prefab for i in table] == ['beefalo', 'beefalo', 'grass', 'rock1']
+
+    ents = {'spider': {1: {'x': 1, 'z': 2}, 2: {'x': 3, 'z': 4, 'data': {}}}}
+    table = EntityTable.from_ents(ents)
+    assert 'spider' in table and [(i.x, i.z, i.data) for i in table] == [(1, 2, None), (3, 4, {})]
+
+
+def test_savedata_entity_table(save_path):
+    table = SaveData(save_path).entity_table
+    assert table.counts() == {'spider': 2} and list(table.x) == [1, 3]
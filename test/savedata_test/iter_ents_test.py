@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+from pytest import raises
+
+from savedata import SaveData
+
+
+def test_iter_ents(save_path):
+    data = SaveData(save_path)
+    assert [tuple(i) for i in data.iter_ents()] == [('spider', 1, 2, None), ('spider', 3, 4, None)]
+    assert list(data.iter_ents({'pigman'})) == []
+    assert 'ents' not in data._converted
+
+    assert [i.x for i in data.iter_ents()] == [i.x for i in (data.ents and data.iter_ents())] == [1, 3]
+    with raises(ValueError):
+        list(SaveData(save_path, sections={'meta'}).iter_ents())
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+from pytest import importorskip, raises
+
+from savedata import SaveData
+from savedata.benchmark import savedata
+from savedata.utils.lua_parser import LuaTable, load, loads
+from savedata.utils.table2dict import LupaTable
+
+
+def test_loads():
+    assert loads('return {}') == {}
+    assert loads('return {1, 2.5, -3, 1e3, 0x10, .5, "a", \'b\', [[c]], [==[d]]e]==], true, false}') == \
+        {1: 1, 2: 2.5, 3: -3, 4: 1000, 5: 16, 6: 0.5, 7: 'a', 8: 'b', 9: 'c', 10: 'd]]e', 11: True, 12: False}
+    assert loads('return {a=nil, b=1, [3]="x", [2.5]=2, ["k"]={}, -- comment\n c={{}, {x=1}}; d=1e300}') == \
+        {'b': 1, 3: 'x', 2.5: 2, 'k': {}, 'c': {1: {}, 2: {'x': 1}}, 'd': 1e300}
+    assert loads('return {s="\\65\\t\\"\\228\\184\\173", n=9007199254740993}') == {'s': 'A\t"中', 'n': 9007199254740992}
+    assert loads('local function a() return {x=1} end\nlocal b = {y=2}\nreturn {a=a(), b=b}') == \
+        {'a': {'x': 1}, 'b': {'y': 2}}
+
+    for text in ('return {a=1+1}', 'return {a=f(1)}', 'return {a=b}', 'return {1, [1]=2}', 'return {a=1', 'x=1'):
+        with raises(ValueError):
+            loads(text)
+
+
+def test_load():
+    text = savedata(100)
+    table = load(text)
+    assert list(table) == ['map', 'meta', 'world_network', 'mods', 'ents']
+    assert table['meta'] == {'saveversion': 5.1, 'build': '600000', 'seed': 1234}
+    assert table.table('map')['width'] == 425 and table['snapshot'] is None
+    assert {k: table[k] for k in table} == loads(text) == loads(savedata(100, functions=False))
+
+
+def test_lupa_fallback(tmp_path):
+    importorskip('lupa.lua51')
+    path = tmp_path / '0000000001'
+    path.write_text(savedata(10).replace('seed=1234', 'seed=1000+234'), encoding='utf-8')
+    data = SaveData(path)
+    assert data.meta['seed'] == 1234
+    assert len(data.ents) == len(loads(savedata(10))['ents'])
+
+
+def test_parser_choice(save_path):
+    importorskip('lupa.lua51')
+    # 完整读取时 lupa 更快，只读取少数几项时 lua_parser 可以跳过 ents
+    assert isinstance(SaveData(save_path)._table, LupaTable)
+    assert isinstance(SaveData(save_path, sections={'map', 'meta'})._table, LuaTable)
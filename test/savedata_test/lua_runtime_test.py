@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from threading import Thread
+
+from pytest import importorskip, raises
+
+from savedata.utils import lua_runtime
+
+
+def test_execute():
+    lupa = importorskip('lupa.lua51')
+    assert dict(lua_runtime.execute('return {a=1}')) == {'a': 1}
+    count = lua_runtime.created()
+    for _ in range(3):
+        assert lua_runtime.execute('x = (x or 0) + 1 return x') == 1
+    assert lua_runtime.created() == count
+
+    # 沙盒中不能访问库函数与 python
+    for code in ('return os.time()', 'return python.eval("1")', 'return {'):
+        with raises(lupa.LuaError):
+            lua_runtime.execute(code)
+
+    thread = Thread(target=lua_runtime.execute, args=('return 1',))
+    thread.start()
+    thread.join()
+    lua_runtime.reset()
+    lua_runtime.execute('return 1')
+    assert lua_runtime.created() == count + 2
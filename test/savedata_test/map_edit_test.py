@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from klei_zip import decode, encode
+
+from savedata import SaveData
+
+
+def test_edit_map(save_path):
+    undertile = encode('return {underneath_tiles={[1]=30, [3]=31}}')
+    save_path.write_text(save_path.read_text(encoding='utf-8').replace(
+        'persistdata={}}', 'persistdata={undertile={str="%s"}}}' % undertile, 1), encoding='utf-8')
+    data = SaveData(save_path)
+    map_ = data.map
+    assert map_.fill_rect(1, 0, 5, 1, 8) == [(0, 1, 2)]
+    assert map_.tiles == [1, 8, 3, 4] and map_.tiledata == [0, 0, 2, 3]
+    assert map_.persistdata.undertile.underneath_tiles == {(1, 1): 31}
+    assert map_.flood_fill(1, 0, 8) == [] and map_.replace(3, 8, tiledata=None) == [(1, 0, 1)]
+
+    tiles, tiledata = map_.copy_region(0, 0, 2, 1)
+    assert map_.paste_region(tiles, 0, 1, tiledata) == [(1, 0, 2)]
+    assert map_.tiles == [1, 8, 1, 8] and map_.tiledata == [0, 0, 0, 0]
+    assert map_.persistdata.undertile.underneath_tiles == {}
+
+    data.write()
+    new = SaveData(save_path)
+    assert new.map.tiles == [1, 8, 1, 8] and new.persistdata.undertile.underneath_tiles == {}
+    assert decode(new._converted['map']['persistdata']['undertile']['str']) == 'return {underneath_tiles={}}'
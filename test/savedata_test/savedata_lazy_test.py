@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from pytest import raises
+
+from savedata import SaveData
+from savedata.map import Map
+
+
+def test_lazy(save_path):
+    data = SaveData(save_path)
+    assert data.meta == {'saveversion': 5.1, 'build': '000'}
+    assert data.persistdata is not None
+    # 只访问了 meta 与 persistdata，其它数据不会被转换
+    assert set(data._converted) == {'meta'}
+    assert 'map' not in data.__dict__
+
+    assert isinstance(data.map, Map) and data.map.tiles == [1, 2, 3, 4] and data.map.tiledata == [0, 1, 2, 3]
+    # 先单独读取的 persistdata 与 map 中的是同一个对象
+    assert data.persistdata is data.map.persistdata
+    assert data.map.tiles[1, 1] == 4 and data.map.tiles.row(0).tolist() == [1, 2]
+    assert data.ents == {'spider': {1: {'x': 1, 'z': 2}, 2: {'x': 3, 'z': 4}}}
+    assert (data.snapshot, data.super, data.extra_data) == ({}, False, {'extra': {'a': 1}})
+    assert set(data.all_data) == {'map', 'meta', 'world_network', 'mods', 'ents', 'extra'}
+
+
+def test_sections(save_path):
+    data = SaveData(save_path, sections={'meta'})
+    assert data.meta['saveversion'] == 5.1
+    assert set(data.all_data) == {'meta'}
+    for name in ('map', 'persistdata', 'ents', 'extra_data'):
+        with raises(ValueError):
+            getattr(data, name)
+
+    with raises(ValueError):
+        SaveData(save_path, sections={'tiles'})
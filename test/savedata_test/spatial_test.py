@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from math import nan
+
+from savedata import SaveData
+from savedata.spatial import SpatialIndex
+from savedata.utils.tileindex2position import tile2world, world2tile
+
+
+def test_world2tile():
+    assert tile2world(0, 0, 425) == (-852, -852) and tile2world(424, 424, 425) == (844, 844)
+    assert tile2world(0, 0, 400) == (-802, -802)
+    assert world2tile(0, 0, 425) == (213, 213) and world2tile(*tile2world(3, 7, 425), 425) == (3, 7)
+
+
+def test_spatial_index():
+    # 地皮坐标 (10, 20)、(11, 20)、(30, 40)、(13, 20)，以及一个没有坐标的实例
+    points = [tile2world(10, 20, 100), tile2world(11, 20, 100), tile2world(30, 40, 100), tile2world(13, 20, 100)]
+    x, z = [i for i, _ in points] + [nan], [j for _, j in points] + [nan]
+    index = SpatialIndex(x, z, 100)
+    assert len(index) == 4
+    assert index.radius(10, 20, 2) == [0, 1] and index.radius(10.5, 20, 0.5) == [0, 1]
+    assert index.radius(*points[0], 12, world=True) == [0, 1, 3]
+    assert index.rect(9, 19, 13, 21) == [0, 1, 3] and index.rect(*points[2], *points[2], world=True) == [2]
+    assert index.nearest(12.9, 20, 2) == [3, 1] and index.nearest(-50, -50, 1) == [0]
+    assert len(index.nearest(0, 0, 10)) == 4
+    assert index.position(2) == (30, 40) and index.position(2, world=True) == points[2]
+
+
+def test_savedata_spatial_index(save_path):
+    data = SaveData(save_path)
+    assert data.spatial_index.nearest(1, 2, world=True) == [0]
+    assert set(data._converted) == set()
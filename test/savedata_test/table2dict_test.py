@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from pytest import importorskip
+
+from savedata.utils.table2dict import Converter
+
+
+def test_converter():
+    lupa = importorskip('lupa.lua51')
+    lua = lupa.LuaRuntime()
+    table = lua.execute('return {a={1, 2, {x=3}}, b={[1]=1, [3]=3}, c={}, d=print}')
+    assert Converter().table_dict(table) == \
+        {'a': {1: 1, 2: 2, 3: {'x': 3}}, 'b': {1: 1, 3: 3}, 'c': {}, 'd': 'this is a function'}
+    assert Converter(lists=True, intern_keys=True).table_dict(table) == \
+        {'a': [1, 2, {'x': 3}], 'b': {1: 1, 3: 3}, 'c': {}, 'd': 'this is a function'}
+    assert Converter().table_dict(lua.eval('1.5')) == 1.5
+
+    # 嵌套深度超过递归限制
+    deep = lua.execute('local t = {} local c = t for i = 1, 5000 do c.a = {} c = c.a end return t')
+    result = Converter().table_dict(deep)
+    for _ in range(5000):
+        result = result['a']
+    assert result == {}
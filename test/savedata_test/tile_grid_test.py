@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from array import array
+
+from pytest import raises
+
+from savedata.map import OldMap, convert_oldtiledata, convert_oldtiles, convert_tiledata, convert_tiles
+from savedata.map.tiles_like_parser import split_planes
+from savedata.map.tile_grid import TileGrid
+
+
+def test_tile_grid():
+    grid = TileGrid(array('H', range(6)), 3)
+    assert (grid.width, grid.height, len(grid)) == (3, 2, 6)
+    assert grid[4] == grid[1, 1] == 4 and grid[-1] == 5 and list(grid[1:3]) == [1, 2]
+    assert grid.row(1).tolist() == [3, 4, 5] and grid.col(2).tolist() == [2, 5]
+    assert grid == [0, 1, 2, 3, 4, 5] == grid.tolist() and grid != grid.reshape(2, 3)
+    with raises(IndexError):
+        grid[3, 0]
+    with raises(ValueError):
+        TileGrid(array('H', range(5)), 3)
+
+
+def test_convert(vrsn):
+    assert convert_tiles(vrsn('<3H', 1, 256, 65535)) == [1, 256, 65535]
+    assert convert_tiledata(vrsn('<6B', 0, 0x70, 0, 0x7f, 0, 0)) == [0, 15, -0x70]
+    assert convert_tiledata(vrsn('<2B', 0, 0xff)) == [0xff - 0x70]
+    with raises(ValueError):
+        convert_tiles(vrsn('<3B', 1, 2, 3))
+
+
+def test_old_map(vrsn):
+    tiles = vrsn('<8B', 1, 0x1a, 2, 0x11, 3, 0x18, 4, 0x1c)
+    planes = split_planes(tiles)
+    assert planes == (b'\x01\x02\x03\x04', b'\x1a\x11\x18\x1c')
+    assert convert_oldtiles(planes) == convert_oldtiles(tiles) == [1, 2, 3, 4]
+    assert convert_oldtiledata(planes) == [0x1a, 0x11, 0x18, 0x1c]
+    old = OldMap(tiles=tiles, prefab='forest', width=2, height=2)
+    assert old.tiles == [1, 2, 3, 4] and old.tiledata == [0x1a, 0x11, 0x18, 0x1c] and old.tiledata[1, 1] == 0x1c
+
+
+def test_edit():
+    grid = TileGrid(array('H', [1, 1, 2, 1,
+                                1, 2, 2, 1,
+                                1, 1, 1, 3]), 4)
+    assert grid.flood_spans(0, 0) == [(0, 0, 2), (1, 0, 1), (2, 0, 3)]
+    assert grid.find_spans(2) == [(0, 2, 3), (1, 1, 3)]
+    assert grid.find_spans(1, grid.rect_spans(2, 0, 9, 2)) == [(0, 3, 4), (1, 3, 4)]
+    assert grid.rect_spans(-1, 2, 2, 5) == [(2, 0, 2)] and grid.rect_spans(3, 0, 3, 2) == []
+    assert grid.polygon_spans([(0, 0), (4, 0), (0, 3)]) == [(0, 0, 3), (1, 0, 2), (2, 0, 1)]
+
+    part = grid.crop(1, 1, 3, 3)
+    assert (part.width, part.height) == (2, 2) and part == [2, 2, 1, 1]
+    assert grid.paste(part, 3, 2) == [(2, 3, 4)] and grid[3, 2] == 2
+    grid.fill_spans([(0, 1, 3)], 9)
+    assert grid.row(0).tolist() == [1, 9, 9, 1]
+    with raises(ValueError):
+        grid.fill_spans([(0, 0, 1)], -1)
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+from klei_zip import encode
+from pytest import raises
+
+from savedata import SaveData
+
+
+def test_write(save_path, tmp_path):
+    text = save_path.read_text(encoding='utf-8').replace('build="000"', 'build="中文"')
+    save_path.write_text(text, encoding='utf-8')
+    data = SaveData(save_path)
+    data.write()
+    assert save_path.read_text(encoding='utf-8') == text
+
+    data.map.tiles[1, 0] = 7
+    data.map.tiledata[0] = 5
+    data.write(tmp_path / 'copy')
+    assert save_path.read_text(encoding='utf-8') == text
+    data.write()
+    for file in (save_path, tmp_path / 'copy'):
+        new = SaveData(file)
+        assert new.map.tiles == [1, 7, 3, 4] and new.map.tiledata == [5, 1, 2, 3] and new.meta['build'] == '中文'
+    assert len(save_path.read_bytes()) == len(text.encode('utf-8'))
+
+
+def test_write_persistdata(save_path):
+    undertile = encode('return {underneath_tiles={[1]=30}}')
+    save_path.write_text(save_path.read_text(encoding='utf-8').replace(
+        'persistdata={}}', 'persistdata={undertile={str="%s"}}}' % undertile, 1), encoding='utf-8')
+
+    # 只修改 persistdata，不转换 map 时也会写回
+    data = SaveData(save_path)
+    data.persistdata.undertile.underneath_tiles[0, 1] = 32
+    data.write()
+    assert 'map' not in data.__dict__
+    assert SaveData(save_path).persistdata.undertile.underneath_tiles == {(1, 0): 30, (0, 1): 32}
+    data.write()
+    assert data.map.persistdata.undertile.underneath_tiles == {(1, 0): 30, (0, 1): 32}
+
+
+def test_write_crlf(save_path, tmp_path):
+    text = save_path.read_text(encoding='utf-8').replace('return {map=', 'return {\r\n\r\n\r\nmap=')
+    save_path.write_bytes(text.encode('utf-8'))
+    data = SaveData(save_path)
+    data.map.tiles[1, 0] = 7
+    # 通过另一个路径指向同一个文件时，也按写回原文件处理
+    data.write(tmp_path / '.' / save_path.name)
+    assert SaveData(save_path).map.tiles == [1, 7, 3, 4]
+    assert save_path.read_bytes().startswith(b'return {\r\n\r\n\r\nmap={tiles="')
+    assert data._converted['map']['tiles'] == SaveData(save_path)._section('map')['tiles']
+
+    # 文件在读取后被修改时不会覆盖其它内容，不读取 ents 时通过 lua_parser 得到各项在文件中的位置
+    data = SaveData(save_path, sections={'map'})
+    data.map.tiles[0, 0] = 9
+    save_path.write_bytes(save_path.read_bytes().replace(b'\r\n', b'\n'))
+    with raises(ValueError):
+        data.write()
+    assert SaveData(save_path).map.tiles == [1, 7, 3, 4]